@@ -15,7 +15,8 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 2. Импортируем настройки базы и Базовый класс
-from app.db.session import Base, DATABASE_URL
+from app.core.config import settings
+from app.db.session import Base
 
 # 3. !!! САМОЕ ВАЖНОЕ !!!
 # Импортируем ВСЕ модели, которые должны быть в базе данных.
@@ -23,12 +24,15 @@ from app.db.session import Base, DATABASE_URL
 from app.models.user import User
 from app.models.service import Service  # <-- Вот этого не хватало
 from app.models.appointment import Appointment  # <--- ДОБАВЬ ЭТУ СТРОКУ
+from app.models.rate_limit import RateLimitBucket
+from app.models.daily_stat import DailyStat
+from app.models.idempotency_key import IdempotencyKey
 # --- КОНЕЦ БЛОКА ИМПОРТОВ ---
 
 config = context.config
 
 # Подставляем URL базы данных
-config.set_main_option("sqlalchemy.url", DATABASE_URL)
+config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
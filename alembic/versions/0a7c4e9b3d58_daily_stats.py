@@ -0,0 +1,65 @@
+"""Appointment price snapshot and daily stats by service and status
+
+Revision ID: 0a7c4e9b3d58
+Revises: f2b6d8e4a917
+Create Date: 2026-03-07 13:37:25.918264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a7c4e9b3d58'
+down_revision: Union[str, Sequence[str], None] = 'f2b6d8e4a917'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Цена на момент записи: выручка в сводке не должна меняться вместе с прайсом
+    op.add_column('appointments', sa.Column('price', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE appointments AS a
+        SET price = s.price
+        FROM services AS s
+        WHERE s.id = a.service_id
+        """
+    )
+    op.alter_column('appointments', 'price', nullable=False)
+
+    op.create_table('daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('bookings', sa.Integer(), nullable=False),
+    sa.Column('booked_minutes', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['service_id'], ['services.id'], ),
+    sa.PrimaryKeyConstraint('day', 'service_id', 'status')
+    )
+    # Сразу заполняем по уже существующим записям
+    op.execute(
+        """
+        INSERT INTO daily_stats (day, service_id, status, bookings, booked_minutes, revenue)
+        SELECT
+            a.time_start::date,
+            a.service_id,
+            a.status,
+            count(*),
+            sum(extract(epoch FROM a.time_end - a.time_start)::int / 60),
+            sum(a.price)
+        FROM appointments AS a
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('daily_stats')
+    op.drop_column('appointments', 'price')
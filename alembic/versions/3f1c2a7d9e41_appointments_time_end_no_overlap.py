@@ -0,0 +1,49 @@
+"""Appointments time_end, day index and no-overlap constraint
+
+Revision ID: 3f1c2a7d9e41
+Revises: b598b4b2cd90
+Create Date: 2026-01-24 12:10:37.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a7d9e41'
+down_revision: Union[str, Sequence[str], None] = 'b598b4b2cd90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('appointments', sa.Column('time_end', sa.DateTime(), nullable=True))
+    # Заполняем конец визита для уже существующих записей
+    op.execute(
+        """
+        UPDATE appointments AS a
+        SET time_end = a.time_start + make_interval(mins => s.duration_minutes)
+        FROM services AS s
+        WHERE s.id = a.service_id
+        """
+    )
+    op.alter_column('appointments', 'time_end', nullable=False)
+    op.create_index('ix_appointments_time_start_status', 'appointments', ['time_start', 'status'], unique=False)
+    op.execute(
+        """
+        ALTER TABLE appointments
+        ADD CONSTRAINT ex_appointments_no_overlap
+        EXCLUDE USING gist (tsrange(time_start, time_end) WITH &&)
+        WHERE (status != 'cancelled')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ex_appointments_no_overlap', 'appointments')
+    op.drop_index('ix_appointments_time_start_status', table_name='appointments')
+    op.drop_column('appointments', 'time_end')
@@ -0,0 +1,63 @@
+"""Appointments without a master block every master in the overlap constraint
+
+Revision ID: 7e2c4a9f1d35
+Revises: 5b3e9d2a7c16
+Create Date: 2026-03-10 09:18:52.660471
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2c4a9f1d35'
+down_revision: Union[str, Sequence[str], None] = '5b3e9d2a7c16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _partitions() -> list[str]:
+    result = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'appointments'
+            ORDER BY child.relname
+            """
+        )
+    )
+    return list(result.scalars())
+
+
+def _rebuild(master_range: str) -> None:
+    for name in _partitions():
+        op.execute(f"ALTER TABLE {name} DROP CONSTRAINT ex_{name}_no_overlap")
+        op.execute(
+            f"""
+            ALTER TABLE {name}
+            ADD CONSTRAINT ex_{name}_no_overlap
+            EXCLUDE USING gist (
+                {master_range} WITH &&,
+                tsrange(time_start, time_end) WITH &&
+            )
+            WHERE (status != 'cancelled')
+            """
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # int4range(NULL, NULL) — неограниченный диапазон: запись без мастера (старые записи и режим
+    # одного кресла) пересекается с записями всех мастеров. Если такие накладки уже есть в базе,
+    # ADD CONSTRAINT упадёт и назовёт их — их надо развести вручную.
+    _rebuild("int4range(master_id, master_id, '[]')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild("int4range(coalesce(master_id, 0), coalesce(master_id, 0), '[]')")
@@ -0,0 +1,28 @@
+"""Users token_version
+
+Revision ID: 8a4e6b0c5d12
+Revises: 3f1c2a7d9e41
+Create Date: 2026-01-31 18:02:11.904513
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4e6b0c5d12'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a7d9e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
@@ -0,0 +1,28 @@
+"""Appointments (time_start, id) index for keyset pagination
+
+Revision ID: c7d2f9a1b384
+Revises: 8a4e6b0c5d12
+Create Date: 2026-02-07 11:26:49.120377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2f9a1b384'
+down_revision: Union[str, Sequence[str], None] = '8a4e6b0c5d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_appointments_time_start_id', 'appointments', ['time_start', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_appointments_time_start_id', table_name='appointments')
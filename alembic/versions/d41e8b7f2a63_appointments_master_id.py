@@ -0,0 +1,58 @@
+"""Appointments master_id, per-master index and no-overlap constraint
+
+Revision ID: d41e8b7f2a63
+Revises: c7d2f9a1b384
+Create Date: 2026-02-14 10:42:18.603915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41e8b7f2a63'
+down_revision: Union[str, Sequence[str], None] = 'c7d2f9a1b384'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('appointments', sa.Column('master_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'appointments_master_id_fkey', 'appointments', 'users', ['master_id'], ['id']
+    )
+    op.create_index(
+        'ix_appointments_master_id_time_start', 'appointments', ['master_id', 'time_start'], unique=False
+    )
+    op.drop_constraint('ex_appointments_no_overlap', 'appointments')
+    # Один мастер — диапазон [id, id]: пересечение диапазонов вместо "=" (без расширения btree_gist)
+    op.execute(
+        """
+        ALTER TABLE appointments
+        ADD CONSTRAINT ex_appointments_no_overlap
+        EXCLUDE USING gist (
+            int4range(coalesce(master_id, 0), coalesce(master_id, 0), '[]') WITH &&,
+            tsrange(time_start, time_end) WITH &&
+        )
+        WHERE (status != 'cancelled')
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ex_appointments_no_overlap', 'appointments')
+    op.execute(
+        """
+        ALTER TABLE appointments
+        ADD CONSTRAINT ex_appointments_no_overlap
+        EXCLUDE USING gist (tsrange(time_start, time_end) WITH &&)
+        WHERE (status != 'cancelled')
+        """
+    )
+    op.drop_index('ix_appointments_master_id_time_start', table_name='appointments')
+    op.drop_constraint('appointments_master_id_fkey', 'appointments', type_='foreignkey')
+    op.drop_column('appointments', 'master_id')
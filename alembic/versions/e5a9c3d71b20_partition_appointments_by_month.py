@@ -0,0 +1,122 @@
+"""Partition appointments by month on time_start
+
+Revision ID: e5a9c3d71b20
+Revises: d41e8b7f2a63
+Create Date: 2026-02-21 09:18:44.271530
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3d71b20'
+down_revision: Union[str, Sequence[str], None] = 'd41e8b7f2a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Сколько месяцев вперёд создать сразу (дальше — python -m app.db.partitions)
+AHEAD_MONTHS = 3
+
+COLUMNS = "id, client_id, service_id, time_start, status, time_end, master_id"
+
+INDEXES = [
+    ('ix_appointments_id', ['id']),
+    ('ix_appointments_time_start_status', ['time_start', 'status']),
+    ('ix_appointments_time_start_id', ['time_start', 'id']),
+    ('ix_appointments_master_id_time_start', ['master_id', 'time_start']),
+]
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def _no_overlap(table: str, name: str) -> None:
+    op.execute(
+        f"""
+        ALTER TABLE {table}
+        ADD CONSTRAINT {name}
+        EXCLUDE USING gist (
+            int4range(coalesce(master_id, 0), coalesce(master_id, 0), '[]') WITH &&,
+            tsrange(time_start, time_end) WITH &&
+        )
+        WHERE (status != 'cancelled')
+        """
+    )
+
+
+def _create_table(name: str, partitioned: bool) -> None:
+    """appointments с теми же колонками; у партиционированной ключ включает time_start."""
+    primary_key = "(id, time_start)" if partitioned else "(id)"
+    op.execute(
+        f"""
+        CREATE TABLE {name} (
+            id INTEGER NOT NULL DEFAULT nextval('appointments_id_seq'),
+            client_id INTEGER NOT NULL REFERENCES users (id),
+            service_id INTEGER NOT NULL REFERENCES services (id),
+            time_start TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            status VARCHAR NOT NULL,
+            time_end TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            master_id INTEGER REFERENCES users (id),
+            CONSTRAINT {name}_pkey PRIMARY KEY {primary_key}
+        ) {"PARTITION BY RANGE (time_start)" if partitioned else ""}
+        """
+    )
+
+
+def _swap(build) -> None:
+    """
+    Пересобираем таблицу: старая переименовывается, новая создаётся build(),
+    данные переливаются, старая удаляется. Последовательность id сохраняется.
+    """
+    op.execute("ALTER SEQUENCE appointments_id_seq OWNED BY NONE")
+    op.execute("ALTER TABLE appointments RENAME TO appointments_old")
+    op.execute("ALTER INDEX appointments_pkey RENAME TO appointments_old_pkey")
+    for index_name, _ in INDEXES:
+        op.execute(f"DROP INDEX {index_name}")
+    build()
+    op.execute(f"INSERT INTO appointments ({COLUMNS}) SELECT {COLUMNS} FROM appointments_old")
+    op.execute("DROP TABLE appointments_old")
+    op.execute("ALTER SEQUENCE appointments_id_seq OWNED BY appointments.id")
+    for index_name, columns in INDEXES:
+        op.create_index(index_name, 'appointments', columns, unique=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    def build() -> None:
+        _create_table('appointments', partitioned=True)
+        # Месяцы с уже существующими записями + AHEAD_MONTHS вперёд от текущего
+        first, last = op.get_bind().execute(
+            sa.text("SELECT min(time_start)::date, max(time_start)::date FROM appointments_old")
+        ).one()
+        current = date.today().replace(day=1)
+        month = min(first or current, current).replace(day=1)
+        last_month = max(last or current, _add_months(current, AHEAD_MONTHS)).replace(day=1)
+        while month <= last_month:
+            name = f"appointments_p{month:%Y%m}"
+            op.execute(
+                f"CREATE TABLE {name} PARTITION OF appointments "
+                f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+            )
+            _no_overlap(name, f"ex_{name}_no_overlap")
+            month = _add_months(month, 1)
+        op.execute("CREATE TABLE appointments_default PARTITION OF appointments DEFAULT")
+        _no_overlap('appointments_default', 'ex_appointments_default_no_overlap')
+
+    _swap(build)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Архивные (отсоединённые) партиции не возвращаются: их нужно прикрепить заранее вручную
+    def build() -> None:
+        _create_table('appointments', partitioned=False)
+        _no_overlap('appointments', 'ex_appointments_no_overlap')
+
+    _swap(build)
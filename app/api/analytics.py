@@ -0,0 +1,88 @@
+from datetime import date, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import Integer, String, and_, case, cast, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.deps import get_current_admin
+from app.core.masters import master_roster
+from app.core.slots import WORK_END_HOUR, WORK_START_HOUR
+from app.db.session import get_read_db
+from app.models.daily_stat import DailyStat
+from app.schemas.analytics import AnalyticsRow
+from app.schemas.token import TokenData
+
+router = APIRouter()
+
+WORK_MINUTES_PER_DAY = (WORK_END_HOUR - WORK_START_HOUR) * 60
+
+
+def _active(column):
+    """Сумма по неотменённым строкам сводки."""
+    return func.coalesce(func.sum(case((DailyStat.status != "cancelled", column), else_=0)), 0)
+
+
+@router.get("/summary", response_model=list[AnalyticsRow])
+async def get_summary(
+    date_from: date,
+    date_to: date,
+    group_by: Literal["day", "month", "service"] = "day",
+    service_id: int | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: TokenData = Depends(get_current_admin)
+):
+    """
+    Записи, занятые минуты, выручка и отмены за период (date_from..date_to включительно)
+    по дням, месяцам или услугам. Читает готовую сводку daily_stats (строк — дни × услуги × статусы),
+    а не таблицу appointments. Только для роли 'admin'.
+    """
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to nie może być wcześniej niż date_from")
+
+    if group_by == "day":
+        key = order = cast(DailyStat.day, String)
+    elif group_by == "month":
+        key = order = func.to_char(DailyStat.day, "YYYY-MM")
+    else:
+        # Сортируем по числу, а не по строке: иначе "10" окажется раньше "2"
+        key, order = cast(DailyStat.service_id, String), DailyStat.service_id
+
+    query = (
+        select(
+            key.label("key"),
+            _active(DailyStat.bookings).label("bookings"),
+            _active(DailyStat.booked_minutes).label("booked_minutes"),
+            _active(DailyStat.revenue).label("revenue"),
+            func.coalesce(
+                func.sum(case((DailyStat.status == "cancelled", DailyStat.bookings), else_=0)), 0
+            ).label("cancelled"),
+            func.count(func.distinct(DailyStat.day)).cast(Integer).label("days"),
+        )
+        .where(and_(DailyStat.day >= date_from, DailyStat.day <= date_to))
+        .group_by(key, order)
+        .order_by(order)
+    )
+    if service_id is not None:
+        query = query.where(DailyStat.service_id == service_id)
+    result = await db.execute(query)
+
+    # Загрузка: занятые минуты / (рабочие минуты дня × кресла × дни периода группы)
+    chairs = len(await master_roster.chairs())
+    rows = []
+    for row in result:
+        item = row._asdict()
+        days = item.pop("days")
+        if group_by == "day":
+            days = 1
+        elif group_by == "month":
+            month_start = max(date.fromisoformat(item["key"] + "-01"), date_from)
+            next_month = (month_start.replace(day=1) + timedelta(days=32)).replace(day=1)
+            days = (min(next_month - timedelta(days=1), date_to) - month_start).days + 1
+        item["utilization"] = (
+            round(item["booked_minutes"] / (WORK_MINUTES_PER_DAY * chairs * days), 4)
+            if group_by != "service" else None
+        )
+        rows.append(item)
+    return rows
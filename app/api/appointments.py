@@ -1,138 +1,665 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import asyncio
+import json
+from contextlib import aclosing
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_
+from sqlalchemy import Integer, and_, insert, literal, or_, tuple_
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timedelta, date
 
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal, get_db, get_read_db, mark_write
 from app.models.appointment import Appointment
-from app.models.service import Service
 from app.models.user import User
-from app.schemas.appointment import AppointmentCreate, AppointmentResponse
-from app.api.deps import get_current_user, get_current_admin  # <--- Добавили Admin
+from app.schemas.token import TokenData
+from app.schemas.appointment import (
+    AppointmentAdminListAdapter,
+    AppointmentAdminResponse,
+    AppointmentBatchCreate,
+    AppointmentBatchItem,
+    AppointmentBatchResponse,
+    AppointmentCreate,
+    AppointmentRecurrence,
+    AppointmentResponse,
+)
+from app.core import idempotency
+from app.core.catalog import service_catalog
+from app.core.masters import master_roster
+from app.core.export import stream_appointments
+from app.core.responses import trusted_response
+from app.core.slot_cache import slot_cache
+from app.core.slot_feed import FeedKey, SlotFeedHub
+from app.db.notify import notify_day_changed
+from app.db.daily_stats import add_booking, new_delta, record_stats
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.api.deps import get_token_data, get_current_admin  # <--- Добавили Admin
+from app.core.slots import (
+    WORK_START_HOUR,
+    WORK_END_HOUR,
+    busy_intervals,
+    free_slots_any,
+    group_by_day,
+    chair_busy,
+    group_by_master,
+    has_overlap,
+    master_filter,
+    merge_intervals,
+    work_window,
+)
+from app.core.config import settings
 
 router = APIRouter()
 
-# --- КОНСТАНТЫ РАБОЧЕГО ДНЯ ---
-WORK_START_HOUR = 10
-WORK_END_HOUR = 20
+# Сколько строк занятости тянуть из курсора за раз при поиске ближайших слотов
+NEXT_AVAILABLE_FETCH_SIZE = 200
+
+EXCLUSION_VIOLATION = "23P01"
+
+
+def _is_overlap_error(error: IntegrityError) -> bool:
+    """Ошибка от ex_<партиция>_no_overlap (SQLSTATE exclusion_violation)."""
+    return getattr(error.orig, "sqlstate", None) == EXCLUSION_VIOLATION
+
+async def _chairs(master_id: int | None) -> list[int | None]:
+    """Кресла для расчёта слотов: выбранный мастер или все (404, если мастера нет)."""
+    chairs = await master_roster.chairs(master_id)
+    if chairs is None:
+        raise HTTPException(status_code=404, detail="Barber nie znaleziony")
+    return chairs
+
+async def _free_masters(
+    db: AsyncSession, master_id: int | None, start_time: datetime, end_time: datetime
+) -> list[int | None]:
+    """
+    Кандидаты для записи: выбранный мастер или все мастера, свободные в [start_time, end_time).
+    Окончательно накладки всё равно проверяет база при вставке.
+    """
+    chairs = await _chairs(master_id)
+    if master_id is not None or chairs == [None]:
+        return chairs
+    result = await db.execute(
+        select(Appointment.master_id).distinct().where(
+            and_(
+                or_(Appointment.master_id.in_(chairs), Appointment.master_id.is_(None)),
+                Appointment.time_start < end_time,
+                Appointment.time_end > start_time,
+                Appointment.status != "cancelled"
+            )
+        )
+    )
+    busy = set(result.scalars())
+    if None in busy:
+        return []  # Запись без мастера в это время занимает все кресла
+    return [chair for chair in chairs if chair not in busy]
+
+def _is_open(start_time: datetime, end_time: datetime) -> bool:
+    """Визит в рабочие часы."""
+    return not (start_time.hour < WORK_START_HOUR or end_time.hour > WORK_END_HOUR)
 
 # 1. СОЗДАНИЕ ЗАПИСИ
 @router.post("/", response_model=AppointmentResponse)
 async def create_appointment(
     appointment_in: AppointmentCreate,
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=255),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_token_data)  # хватает данных из токена
 ):
-    """Создать запись (с проверкой накладок)"""
-    result = await db.execute(select(Service).where(Service.id == appointment_in.service_id))
-    service = result.scalars().first()
+    """
+    Создать запись (с проверкой накладок).
+    С заголовком Idempotency-Key повтор запроса получает сохранённый ответ первого,
+    без проверки накладок и новой записи.
+    """
+    scope = f"appointments:{current_user.user_id}"
+    if idempotency_key:
+        request_fingerprint = idempotency.fingerprint(appointment_in)
+        replay = await idempotency.find_response(db, scope, idempotency_key, request_fingerprint)
+        if replay is not None:
+            return replay
+
+    service = await service_catalog.get(appointment_in.service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Usługa nie znaleziona")
 
     start_time = appointment_in.time_start
     end_time = start_time + timedelta(minutes=service.duration_minutes)
 
-    if start_time.hour < WORK_START_HOUR or end_time.hour > WORK_END_HOUR:
+    if not _is_open(start_time, end_time):
          raise HTTPException(status_code=400, detail="Barbershop jest zamknięty")
 
-    day_start = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
-    day_end = day_start + timedelta(days=1)
-    
-    query = select(Appointment).join(Service).where(
-        and_(
-            Appointment.time_start >= day_start,
-            Appointment.time_start < day_end,
-            Appointment.status != "cancelled"
+    # Накладки проверяет сама база (exclusion constraint ex_<партиция>_no_overlap, по каждому мастеру):
+    # одна вставка по индексу вместо загрузки всего дня, и это безопасно при параллельных запросах.
+    # Без master_id пробуем свободных мастеров по очереди, пока вставка не пройдёт
+    candidates = await _free_masters(db, appointment_in.master_id, start_time, end_time)
+    for master_id in candidates:
+        new_appointment = Appointment(
+            client_id=current_user.user_id,
+            service_id=appointment_in.service_id,
+            master_id=master_id,
+            time_start=start_time,
+            time_end=end_time,
+            status="confirmed",
+            price=service.price
         )
+        db.add(new_appointment)
+        stats = new_delta()
+        add_booking(stats, start_time, end_time, service.id, "confirmed", service.price)
+        try:
+            await db.flush()  # INSERT: здесь база и проверяет накладки
+            await record_stats(db, stats)  # Сводка для аналитики — в той же транзакции
+            await notify_day_changed(db, start_time.date())  # Уйдёт всем воркерам после COMMIT
+            if idempotency_key and not await idempotency.save_response(
+                db, scope, idempotency_key, request_fingerprint, AppointmentResponse.model_validate(new_appointment)
+            ):
+                return await idempotency.replay_after_race(db, scope, idempotency_key, request_fingerprint)
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if not _is_overlap_error(e):
+                raise
+            continue
+        break
+    else:
+        # Термин мог занять параллельный повтор этого же запроса — тогда отдаём его ответ
+        if idempotency_key:
+            replay = await idempotency.find_response(db, scope, idempotency_key, request_fingerprint)
+            if replay is not None:
+                return replay
+        raise HTTPException(status_code=400, detail="Ten termin jest już zajęty")
+    slot_cache.evict_day(start_time.date())
+    await db.refresh(new_appointment)
+    mark_write(response)
+    return new_appointment
+
+def _expand_recurrence(recurrence: AppointmentRecurrence) -> list[datetime]:
+    """Все времена правила повторения (не больше BATCH_MAX_ITEMS + 1 — дальше всё равно 400)."""
+    if recurrence.count is None and recurrence.until is None:
+        raise HTTPException(status_code=400, detail="Podaj count lub until")
+    times = []
+    step = timedelta(days=recurrence.interval_days)
+    time_start = recurrence.start
+    while len(times) <= settings.BATCH_MAX_ITEMS:
+        if recurrence.count is not None and len(times) >= recurrence.count:
+            break
+        if recurrence.until is not None and time_start.date() > recurrence.until:
+            break
+        times.append(time_start)
+        time_start += step
+    return times
+
+async def _busy_on_days(db: AsyncSession, days: set[date], master_id: int | None):
+    """Занятые интервалы (master_id, time_start, time_end) только за нужные дни — одним запросом."""
+    day_ranges = []
+    for day in sorted(days):
+        day_start = datetime.combine(day, datetime.min.time())
+        day_ranges.append(and_(
+            Appointment.time_start >= day_start,
+            Appointment.time_start < day_start + timedelta(days=1),
+        ))
+    query = select(Appointment.master_id, Appointment.time_start, Appointment.time_end).where(
+        and_(or_(*day_ranges), Appointment.status != "cancelled")
     )
+    if master_id is not None:
+        query = query.where(master_filter(master_id))
     result = await db.execute(query)
-    existing_appointments = result.scalars().all()
-
-    for existing in existing_appointments:
-        existing_end = existing.time_start + timedelta(minutes=existing.service.duration_minutes)
-        if start_time < existing_end and end_time > existing.time_start:
-             raise HTTPException(status_code=400, detail="Ten termin jest już zajęty")
-
-    new_appointment = Appointment(
-        client_id=current_user.id,
-        service_id=appointment_in.service_id,
-        time_start=start_time,
-        status="confirmed"
+    return result.all()
+
+async def _plan_batch(
+    db: AsyncSession, times: list[datetime], duration: timedelta, chairs: list[int | None], master_id: int | None
+) -> tuple[list[AppointmentBatchItem], list[dict]]:
+    """
+    Раскладывает времена пакета по мастерам в памяти: занятость всех затронутых дней берётся
+    одним запросом, принятые визиты пакета сразу добавляются к занятости своего мастера.
+    """
+    busy_by_master = group_by_master(await _busy_on_days(db, {t.date() for t in times}, master_id))
+    merged = {chair: merge_intervals(chair_busy(busy_by_master, chair)) for chair in chairs}
+
+    items, rows, seen = [], [], set()
+    for time_start in times:
+        time_end = time_start + duration
+        if not _is_open(time_start, time_end):
+            items.append(AppointmentBatchItem(time_start=time_start, status="closed"))
+            continue
+        # Одно и то же время дважды в пакете — второй раз конфликт, а не запись к другому мастеру
+        free = [] if time_start in seen else [
+            chair for chair in chairs if not has_overlap(merged[chair], time_start, time_end)
+        ]
+        seen.add(time_start)
+        if not free:
+            items.append(AppointmentBatchItem(time_start=time_start, status="conflict"))
+            continue
+        chair = free[0]
+        merged[chair] = merge_intervals([*merged[chair], (time_start, time_end)])
+        items.append(AppointmentBatchItem(time_start=time_start, status="created", master_id=chair))
+        rows.append({"master_id": chair, "time_start": time_start, "time_end": time_end})
+    return items, rows
+
+# 1.0.1 ПАКЕТНАЯ / ПОВТОРЯЮЩАЯСЯ ЗАПИСЬ
+@router.post("/batch", response_model=AppointmentBatchResponse)
+async def create_appointments_batch(
+    batch_in: AppointmentBatchCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenData = Depends(get_token_data)
+):
+    """
+    Записаться сразу на несколько времён (список times или правило recurrence).
+    Занятость всех затронутых дней — один запрос, проверка — в памяти, принятые визиты —
+    одна многострочная вставка в одной транзакции. В ответе — статус каждого времени.
+    """
+    if (batch_in.times is None) == (batch_in.recurrence is None):
+        raise HTTPException(status_code=400, detail="Podaj times albo recurrence")
+    times = batch_in.times if batch_in.times is not None else _expand_recurrence(batch_in.recurrence)
+    if not times:
+        raise HTTPException(status_code=400, detail="Brak terminów")
+    if len(times) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maksymalnie {settings.BATCH_MAX_ITEMS} wizyt na zapytanie"
+        )
+
+    service = await service_catalog.get(batch_in.service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Usługa nie znaleziona")
+    duration = timedelta(minutes=service.duration_minutes)
+    chairs = await _chairs(batch_in.master_id)
+
+    # Если между чтением и вставкой кто-то занял одно из времён, база отклонит всю вставку
+    # (ex_<партиция>_no_overlap) — тогда один раз пересчитываем план по свежим данным
+    for attempt in range(2):
+        items, rows = await _plan_batch(db, times, duration, chairs, batch_in.master_id)
+        if not rows:
+            break
+        for row in rows:
+            row.update(
+                client_id=current_user.user_id, service_id=batch_in.service_id,
+                status="confirmed", price=service.price,
+            )
+        try:
+            result = await db.execute(
+                insert(Appointment).values(rows).returning(Appointment.id, Appointment.time_start)
+            )
+            ids = {time_start: appointment_id for appointment_id, time_start in result}
+            stats = new_delta()
+            for row in rows:
+                add_booking(stats, row["time_start"], row["time_end"], service.id, "confirmed", service.price)
+            await record_stats(db, stats)
+            for day in sorted({row["time_start"].date() for row in rows}):
+                await notify_day_changed(db, day)
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if not _is_overlap_error(e):
+                raise
+            if attempt:
+                raise HTTPException(status_code=409, detail="Terminy właśnie się zmieniły, spróbuj ponownie")
+            continue
+        # Времена принятых визитов в пакете не повторяются
+        for item in items:
+            if item.status == "created":
+                item.id = ids[item.time_start]
+        for day in {row["time_start"].date() for row in rows}:
+            slot_cache.evict_day(day)
+        mark_write(response)
+        break
+
+    return AppointmentBatchResponse(
+        created=sum(item.status == "created" for item in items),
+        items=items,
     )
-    db.add(new_appointment)
-    await db.commit()
-    await db.refresh(new_appointment)
-    return new_appointment
+
+# 1.1 ОТМЕНА ЗАПИСИ (Клиент — свою, админ — любую)
+@router.patch("/{appointment_id}/cancel", response_model=AppointmentResponse)
+async def cancel_appointment(
+    appointment_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: TokenData = Depends(get_token_data)
+):
+    """Отменить запись: время освобождается, все воркеры сбрасывают слоты этого дня"""
+    # FOR UPDATE: параллельная отмена той же записи ждёт нашего COMMIT и уже видит cancelled,
+    # иначе обе перенесли бы визит в сводке daily_stats
+    result = await db.execute(
+        select(Appointment).where(Appointment.id == appointment_id).with_for_update()
+    )
+    appointment = result.scalars().first()
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Wizyta nie znaleziona")
+    if appointment.client_id != current_user.user_id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="To nie jest Twoja wizyta")
+
+    if appointment.status != "cancelled":
+        # Переносим визит в сводке из старого статуса в cancelled
+        stats = new_delta()
+        for status, sign in ((appointment.status, -1), ("cancelled", 1)):
+            add_booking(
+                stats, appointment.time_start, appointment.time_end,
+                appointment.service_id, status, appointment.price, sign,
+            )
+        appointment.status = "cancelled"
+        await record_stats(db, stats)
+        await notify_day_changed(db, appointment.time_start.date())
+        await db.commit()
+        slot_cache.evict_day(appointment.time_start.date())
+        mark_write(response)
+    return appointment
 
 # 2. СВОБОДНЫЕ СЛОТЫ (Для всех)
 @router.get("/slots/")
 async def get_available_slots(
     service_id: int,
     check_date: date,
-    db: AsyncSession = Depends(get_db)
+    master_id: int | None = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Показать доступные часы"""
-    result = await db.execute(select(Service).where(Service.id == service_id))
-    service = result.scalars().first()
+    """
+    Показать доступные часы у мастера master_id или у любого мастера (из кэша воркера,
+    пока в этом дне ничего не менялось)
+    """
+    cached_slots = slot_cache.get(check_date, service_id, master_id)
+    if cached_slots is not None:
+        return trusted_response({"date": check_date, "available_slots": cached_slots})
+    cache_epoch = slot_cache.epoch
+
+    service = await service_catalog.get(service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
+    chairs = await _chairs(master_id)
+
     duration = timedelta(minutes=service.duration_minutes)
     day_start = datetime.combine(check_date, datetime.min.time())
     day_end = day_start + timedelta(days=1)
 
-    query = select(Appointment).join(Service).where(
+    # «Любой мастер»: один запрос на день всех мастеров, слоты считаем по каждому и объединяем
+    busy_by_master = group_by_master(await busy_intervals(db, day_start, day_end, master_id))
+
+    available_slots = [
+        slot.strftime("%H:%M")
+        for slot in free_slots_any(busy_by_master, chairs, work_window(check_date), duration)
+    ]
+    slot_cache.set(check_date, service_id, master_id, available_slots, cache_epoch)
+
+    return trusted_response({"date": check_date, "available_slots": available_slots})
+
+async def _load_feed_slots(day: date, keys: list[FeedKey]) -> dict[FeedKey, list[str]]:
+    """
+    Слоты дня для подписчиков SSE: один запрос занятости дня на все ключи.
+    Читаем из основной базы — пересчёт идёт сразу после NOTIFY, реплика может ещё не догнать.
+    """
+    day_start = datetime.combine(day, datetime.min.time())
+    async with AsyncSessionLocal() as db:
+        busy_by_master = group_by_master(await busy_intervals(db, day_start, day_start + timedelta(days=1)))
+        slots = {}
+        for service_id, master_id in keys:
+            service = await service_catalog.get(service_id)
+            chairs = await master_roster.chairs(master_id)
+            if service is None or chairs is None:
+                slots[(service_id, master_id)] = []
+                continue
+            duration = timedelta(minutes=service.duration_minutes)
+            slots[(service_id, master_id)] = [
+                slot.strftime("%H:%M")
+                for slot in free_slots_any(busy_by_master, chairs, work_window(day), duration)
+            ]
+    return slots
+
+# Один хаб на воркер; изменения дней приходят из DayChangeListener (подписка в lifespan)
+slot_feed = SlotFeedHub(_load_feed_slots, queue_size=settings.SSE_QUEUE_SIZE)
+
+def _sse_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+# 2.0.1 ЛЕНТА СВОБОДНЫХ СЛОТОВ (SSE, для всех) — вместо опроса /slots/
+@router.get("/slots/stream")
+async def stream_available_slots(
+    service_id: int,
+    check_date: date,
+    master_id: int | None = None,
+):
+    """
+    Server-Sent Events: сначала событие snapshot со всеми свободными часами дня,
+    потом diff ({"added": [...], "removed": [...]}) после каждой записи или отмены в этом дне.
+    Если клиент не успевает читать, вместо накопившихся diff придёт новый snapshot.
+    """
+    service = await service_catalog.get(service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    await _chairs(master_id)
+    key = (service_id, master_id)
+    subscriber, slots = await slot_feed.subscribe(check_date, key)
+
+    async def events():
+        try:
+            yield _sse_event("snapshot", {"date": check_date.isoformat(), "available_slots": slots})
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(
+                        subscriber.queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"  # Комментарий SSE: прокси не закроют простаивающее соединение
+                    continue
+                yield _sse_event(event, data)
+        finally:
+            slot_feed.unsubscribe(check_date, key, subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _range_bounds(date_from: date, date_to: date) -> tuple[datetime, datetime]:
+    """[начало date_from, начало дня после date_to) — обе даты включительно."""
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to nie może być wcześniej niż date_from")
+    range_start = datetime.combine(date_from, datetime.min.time())
+    range_end = datetime.combine(date_to, datetime.min.time()) + timedelta(days=1)
+    return range_start, range_end
+
+# 2.1 КАЛЕНДАРЬ СВОБОДНЫХ СЛОТОВ НА НЕСКОЛЬКО ДНЕЙ (Для всех)
+@router.get("/calendar/")
+async def get_availability_calendar(
+    service_id: int,
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    master_id: int | None = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Свободные часы (у мастера master_id или у любого мастера) на каждый день периода (from..to включительно, не больше CALENDAR_MAX_DAYS дней).
+    Один запрос в базу на весь период вместо запроса /slots/ на каждый день.
+    """
+    range_start, range_end = _range_bounds(date_from, date_to)
+    days_count = (date_to - date_from).days + 1
+    if days_count > settings.CALENDAR_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Maksymalnie {settings.CALENDAR_MAX_DAYS} dni na zapytanie"
+        )
+
+    service = await service_catalog.get(service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    duration = timedelta(minutes=service.duration_minutes)
+    chairs = await _chairs(master_id)
+
+    rows = await busy_intervals(db, range_start, range_end, master_id)
+    busy_by_master_day = {
+        chair: group_by_day(intervals) for chair, intervals in group_by_master(rows).items()
+    }
+
+    days = {}
+    for offset in range(days_count):
+        day = date_from + timedelta(days=offset)
+        busy_by_master = {chair: by_day.get(day, []) for chair, by_day in busy_by_master_day.items()}
+        days[day.isoformat()] = [
+            slot.strftime("%H:%M")
+            for slot in free_slots_any(busy_by_master, chairs, work_window(day), duration)
+        ]
+
+    return trusted_response({"service_id": service_id, "days": days})
+
+async def _busy_days(
+    db: AsyncSession, first_day: date, last_day: date, master_id: int | None
+):
+    """
+    (день, занятые интервалы дня) подряд с first_day по last_day, включая пустые дни.
+    Читает один упорядоченный по time_start курсор порциями: сколько дней возьмёт
+    вызывающий, столько и будет прочитано из базы.
+    """
+    range_start = datetime.combine(first_day, datetime.min.time())
+    range_end = datetime.combine(last_day, datetime.min.time()) + timedelta(days=1)
+    query = select(Appointment.master_id, Appointment.time_start, Appointment.time_end).where(
         and_(
-            Appointment.time_start >= day_start,
-            Appointment.time_start < day_end,
+            Appointment.time_start >= range_start,
+            Appointment.time_start < range_end,
             Appointment.status != "cancelled"
         )
     )
-    result = await db.execute(query)
-    appointments = result.scalars().all()
-
-    available_slots = []
-    current_slot = datetime.combine(check_date, datetime.min.time()).replace(hour=WORK_START_HOUR)
-    work_end = current_slot.replace(hour=WORK_END_HOUR)
-
-    while current_slot + duration <= work_end:
-        slot_end = current_slot + duration
-        is_free = True
-        for appt in appointments:
-            appt_end = appt.time_start + timedelta(minutes=appt.service.duration_minutes)
-            if current_slot < appt_end and slot_end > appt.time_start:
-                is_free = False
+    if master_id is not None:
+        query = query.where(master_filter(master_id))
+    query = query.order_by(Appointment.time_start).execution_options(yield_per=NEXT_AVAILABLE_FETCH_SIZE)
+
+    result = await db.stream(query)
+    try:
+        day, rows = first_day, []
+        async for row in result:
+            while day < row.time_start.date():
+                yield day, rows
+                day, rows = day + timedelta(days=1), []
+            rows.append(row)
+        while day <= last_day:
+            yield day, rows
+            day, rows = day + timedelta(days=1), []
+    finally:
+        await result.close()
+
+# 2.2 БЛИЖАЙШИЕ СВОБОДНЫЕ СЛОТЫ (Для всех)
+@router.get("/next-available")
+async def get_next_available(
+    service_id: int,
+    after: datetime | None = None,
+    count: int = Query(1, ge=1, le=50),
+    master_id: int | None = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Ближайшие count свободных слотов после after (по умолчанию — сейчас) у мастера master_id
+    или у любого мастера. Идёт по дням вперёд по одному курсору и останавливается, как только
+    нашёл count слотов: цена зависит от того, как далеко ответ, а не от числа проверенных дней.
+    """
+    # Все времена в базе — местное время без пояса; с "Z" или "+02:00" сравнить их не с чем
+    if after is not None and after.tzinfo is not None:
+        raise HTTPException(status_code=400, detail="Podaj czas lokalny bez strefy czasowej")
+    after = after or datetime.now()
+    service = await service_catalog.get(service_id)
+    if not service:
+        raise HTTPException(status_code=404, detail="Service not found")
+    chairs = await _chairs(master_id)
+    duration = timedelta(minutes=service.duration_minutes)
+
+    last_day = after.date() + timedelta(days=settings.NEXT_AVAILABLE_MAX_DAYS - 1)
+    found: list[datetime] = []
+    async with aclosing(_busy_days(db, after.date(), last_day, master_id)) as days:
+        async for day, rows in days:
+            day_slots = free_slots_any(group_by_master(rows), chairs, work_window(day), duration)
+            found.extend(slot for slot in day_slots if slot >= after)
+            if len(found) >= count:
                 break
-        if is_free:
-            available_slots.append(current_slot.strftime("%H:%M"))
-        current_slot += timedelta(minutes=30)
 
-    return {"date": check_date, "available_slots": available_slots}
+    return trusted_response({
+        "service_id": service_id,
+        "master_id": master_id,
+        "slots": found[:count],
+    })
 
 # 👇 3. АДМИНКА: ВСЕ ЗАПИСИ (Только для Админа)
-@router.get("/admin/", response_model=list[AppointmentResponse])
+# Колонки списка для админки: ровно поля AppointmentAdminResponse
+ADMIN_LIST_COLUMNS = (
+    Appointment.id,
+    Appointment.service_id,
+    Appointment.time_start,
+    Appointment.client_id,
+    Appointment.master_id,
+    Appointment.status,
+    User.full_name.label("client_name"),
+    User.phone.label("client_phone"),
+)
+
+@router.get("/admin/", response_model=list[AppointmentAdminResponse])
 async def get_all_appointments_admin(
-    check_date: date,
-    db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_admin) # <--- Фейсконтроль
+    date_from: date | None = None,
+    date_to: date | None = None,
+    check_date: date | None = None,  # Старый вариант: один день
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_read_db),
+    current_admin: TokenData = Depends(get_current_admin) # <--- Фейсконтроль
 ):
     """
-    Показать все записи на выбранный день.
+    Показать записи за период (date_from..date_to включительно) или за один день check_date.
+    Постранично по (time_start, id): курсор следующей страницы — в заголовке X-Next-Cursor.
+    Вместе с именем и телефоном клиента (JOIN users, только нужные колонки — без ORM-объектов).
+    Строки уже ровно по схеме ответа, поэтому отдаются через trusted_response без повторной валидации.
     Только для роли 'admin'.
     """
-    day_start = datetime.combine(check_date, datetime.min.time())
-    day_end = day_start + timedelta(days=1)
+    if check_date is not None:
+        date_from = date_to = check_date
+    if date_from is None:
+        raise HTTPException(status_code=400, detail="Podaj date_from lub check_date")
+    range_start, range_end = _range_bounds(date_from, date_to or date_from)
 
-    # Загружаем записи + данные клиента (join User)
-    query = select(Appointment).where(
+    query = select(*ADMIN_LIST_COLUMNS).join(User, User.id == Appointment.client_id).where(
         and_(
-            Appointment.time_start >= day_start,
-            Appointment.time_start < day_end
+            Appointment.time_start >= range_start,
+            Appointment.time_start < range_end
         )
-    ).order_by(Appointment.time_start) # Сортируем по времени
-    
+    )
+    if cursor is not None:
+        last_time_start, last_id = decode_cursor(cursor, datetime, int)
+        query = query.where(
+            tuple_(Appointment.time_start, Appointment.id)
+            > tuple_(literal(last_time_start), literal(last_id, Integer))
+        )
+    # Сортируем по времени; индекс ix_appointments_time_start_id
+    query = query.order_by(Appointment.time_start, Appointment.id).limit(limit + 1)
+
     result = await db.execute(query)
-    appointments = result.scalars().all()
-    
-    return appointments
\ No newline at end of file
+    appointments = [row._asdict() for row in result]
+
+    headers = {}
+    if len(appointments) > limit:
+        appointments = appointments[:limit]
+        last = appointments[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(last["time_start"], last["id"])
+    return trusted_response(appointments, AppointmentAdminListAdapter, headers=headers)
+
+# 4. АДМИНКА: ВЫГРУЗКА ЗА ПЕРИОД (NDJSON / CSV)
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+@router.get("/admin/export")
+async def export_appointments_admin(
+    date_from: date,
+    date_to: date,
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    current_admin: TokenData = Depends(get_current_admin)
+):
+    """
+    Потоковая выгрузка записей за период (с данными клиента и услуги) для сверки в конце месяца.
+    Память не растёт с размером периода: строки идут с серверного курсора пачками.
+    """
+    range_start, range_end = _range_bounds(date_from, date_to)
+    filename = f"appointments_{date_from}_{date_to}.{export_format}"
+    return StreamingResponse(
+        stream_appointments(range_start, range_end, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
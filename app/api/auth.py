@@ -1,39 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
 from app.models.user import User
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_and_update_password, create_access_token
 from app.schemas.token import Token
 from datetime import timedelta
-from app.core.security import ACCESS_TOKEN_EXPIRE_MINUTES
+from app.core.config import settings
+from app.core.ratelimit import login_account_limiter, login_ip_limiter, password_gate
 
 router = APIRouter()
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(), 
     db: AsyncSession = Depends(get_db)
 ):
+    # 0. Лимиты до любой работы: попытки с одного IP и на один аккаунт (429)
+    # (за прокси адрес клиента берётся из X-Forwarded-For: uvicorn --proxy-headers)
+    client_ip = request.client.host if request.client else "unknown"
+    await login_ip_limiter.check(client_ip)
+    await login_account_limiter.check(form_data.username.strip().lower())
+
     # 1. Ищем пользователя по email
     # (OAuth2PasswordRequestForm всегда кладет email в поле username)
     query = select(User).where(User.email == form_data.username)
     result = await db.execute(query)
     user = result.scalar_one_or_none()
 
-    # 2. Проверяем пароль
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    # 2. Проверяем пароль (bcrypt считается в пуле потоков, event loop не блокируется).
+    # Если проверок уже слишком много — сразу 503, а не очередь к пулу потоков
+    is_valid, new_hash = False, None
+    if user:
+        with password_gate.admit():
+            is_valid, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not is_valid or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Если BCRYPT_ROUNDS поменялся — незаметно пересохраняем хеш
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
     # 3. Если всё ок — выдаем токен
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={
+            "sub": user.email,
+            "uid": user.id,
+            "role": user.role,
+            "ver": user.token_version,
+        },
+        expires_delta=access_token_expires,
     )
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
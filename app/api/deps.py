@@ -1,46 +1,100 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select  # <--- ВАЖНЫЙ ИМПОРТ
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.db.session import get_db
+from app.db.session import get_read_db
 from app.models.user import User
+from app.schemas.token import TokenData
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Nieprawidłowe dane uwierzytelniające",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+# Кэш пользователей по id (только для хендлеров, которым нужен весь объект User)
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+# Отозванные токены: user_id -> наименьшая действующая версия. Запись живёт столько же, сколько токен
+revoked_tokens = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Nieprawidłowe dane uwierzytelniające",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+def _is_revoked(user: User, token_data: TokenData) -> bool:
+    return not user.is_active or user.token_version != token_data.token_version
+
+
+def revoke_tokens(user_id: int | None, token_version: int = 0) -> None:
+    """
+    Подписчик TOKENS_CHANNEL (app/db/notify.py), в каждом воркере: токены user_id версии
+    ниже token_version больше не принимаем. None — LISTEN переподключился и мог пропустить
+    уведомления: сбрасываем кэш пользователей, чтобы админские проверки сходили в базу.
+    """
+    if user_id is None:
+        user_cache.clear()
+        return
+    user_cache.pop(user_id)
+    if token_version > revoked_tokens.get(user_id, 0):
+        revoked_tokens.set(user_id, token_version)
+
+
+async def get_token_data(token: str = Depends(oauth2_scheme)) -> TokenData:
+    """
+    Проверка доступа только по содержимому JWT (id, роль, версия токена) — без запроса в базу.
+    Отзыв видим из revoked_tokens (рассылка всем воркерам) и из кэша пользователей.
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+        token_data = TokenData(
+            email=payload.get("sub"),
+            user_id=payload.get("uid"),
+            role=payload.get("role"),
+            token_version=payload.get("ver", 0),
+        )
+    except (JWTError, ValidationError):
+        raise credentials_exception
+
+    if token_data.token_version < revoked_tokens.get(token_data.user_id, 0):
         raise credentials_exception
-    
-    # 👇 ИСПРАВЛЕННЫЙ ПОИСК (Ищем по email, а не по ID)
-    query = select(User).where(User.email == email)
-    result = await db.execute(query)
-    user = result.scalars().first()
+    cached_user = user_cache.get(token_data.user_id)
+    if cached_user is not None and _is_revoked(cached_user, token_data):
+        raise credentials_exception
+    return token_data
+
 
+async def get_current_user(
+    token_data: TokenData = Depends(get_token_data),
+    db: AsyncSession = Depends(get_read_db)
+) -> User:
+    """Полный объект пользователя: из кэша, а если его там нет — из базы."""
+    user = user_cache.get(token_data.user_id)
     if user is None:
+        result = await db.execute(select(User).where(User.id == token_data.user_id))
+        user = result.scalars().first()
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user.id, user)
+
+    if _is_revoked(user, token_data):
         raise credentials_exception
     return user
 
 async def get_current_admin(
-    current_user: User = Depends(get_current_user),
-) -> User:
-    if current_user.role != "admin":
+    token_data: TokenData = Depends(get_token_data),
+    db: AsyncSession = Depends(get_read_db)
+) -> TokenData:
+    """
+    Роль — из JWT, но версию токена админа сверяем с кэшем или базой (get_current_user):
+    если рассылка отзыва потерялась, права админа пропадут не позже USER_CACHE_TTL_SECONDS.
+    """
+    if token_data.role != "admin":
         raise HTTPException(
             status_code=403,
             detail="Brak uprawnień administratora"
         )
-    return current_user
\ No newline at end of file
+    await get_current_user(token_data, db)
+    return token_data
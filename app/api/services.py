@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from bisect import bisect_right
+
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from app.db.session import get_db
+from app.core.catalog import service_catalog
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.db.session import get_db, mark_write
 from app.models.service import Service
-from app.models.user import User
-from app.schemas.service import ServiceCreate, ServiceResponse
+from app.schemas.token import TokenData
+from app.schemas.service import ServiceCreate, ServiceListAdapter, ServiceResponse
 from app.api.deps import get_current_admin  # <--- Импортируем охрану
 
 router = APIRouter()
@@ -13,8 +16,9 @@ router = APIRouter()
 @router.post("/", response_model=ServiceResponse)
 async def create_service(
     service: ServiceCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    current_admin: User = Depends(get_current_admin) # <--- Защита включена
+    current_admin: TokenData = Depends(get_current_admin) # <--- Защита включена
 ):
     """
     Dodaj nową usługę (Tylko Admin).
@@ -28,18 +32,38 @@ async def create_service(
     db.add(new_service)
     await db.commit()
     await db.refresh(new_service)
+    service_catalog.invalidate()
+    mark_write(response)
     return new_service
 
 # 2. Просмотр списка - ДЛЯ ВСЕХ (Защиты нет)
 @router.get("/", response_model=list[ServiceResponse])
 async def read_services(
-    skip: int = 0,
-    limit: int = 100,
-    db: AsyncSession = Depends(get_db)
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0, deprecated=True),  # Старые клиенты; новым — cursor
+    if_none_match: str | None = Header(default=None),
 ):
     """
     Lista usług (Dostępne dla wszystkich).
+    Отдаётся из каталога в памяти; с If-None-Match клиент получает 304, если ничего не менялось.
+    Постранично — по курсору из заголовка X-Next-Cursor (ключ — id).
     """
-    result = await db.execute(select(Service).offset(skip).limit(limit))
-    services = result.scalars().all()
-    return services
\ No newline at end of file
+    services = await service_catalog.all()
+    headers = {"ETag": service_catalog.etag}
+    if if_none_match == service_catalog.etag:
+        return Response(status_code=304, headers=headers)
+
+    start = skip
+    if cursor is not None:
+        (after_id,) = decode_cursor(cursor, int)
+        start = bisect_right(services, after_id, key=lambda s: s.id)  # каталог отсортирован по id
+    page = services[start:start + limit]
+    if start + limit < len(services):
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(page[-1].id)
+
+    if start == 0 and len(page) == len(services):
+        body = service_catalog.body  # Уже сериализованный каталог целиком
+    else:
+        body = ServiceListAdapter.dump_json(page)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,16 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.api.deps import get_current_user # <-- Добавить этот импорт
-from app.db.session import get_db
-from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse
-from app.core.security import get_password_hash
+from sqlalchemy.exc import IntegrityError
+from app.api.deps import get_current_user, get_current_admin, revoke_tokens, user_cache # <-- Добавить этот импорт
+from app.db.notify import notify_tokens_revoked
+from app.db.session import get_db, get_read_db, mark_write
+from app.models.user import User, UserRole
+from app.schemas.token import TokenData
+from app.schemas.user import MasterResponse, UserCreate, UserResponse
+from app.core.security import get_password_hash_async
+from app.core.masters import master_roster
+from app.core import idempotency
 
 router = APIRouter()
 
+# Регистрация без токена: ключи Idempotency-Key общие для всех анонимных клиентов
+USERS_SCOPE = "users"
+
 @router.post("/", response_model=UserResponse)
-async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
+async def create_user(
+    user_in: UserCreate,
+    response: Response,
+    idempotency_key: str | None = Header(None, max_length=255),
+    db: AsyncSession = Depends(get_db)
+):
+    # 0. Повтор с тем же Idempotency-Key — сохранённый ответ, без bcrypt и проверки email
+    if idempotency_key:
+        request_fingerprint = idempotency.fingerprint(user_in)
+        replay = await idempotency.find_response(db, USERS_SCOPE, idempotency_key, request_fingerprint)
+        if replay is not None:
+            return replay
+
     # 1. Проверяем, есть ли уже такой email
     query = select(User).where(User.email == user_in.email)
     result = await db.execute(query)
@@ -25,16 +45,32 @@ async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     # 2. Создаем нового пользователя
     new_user = User(
         email=user_in.email,
-        hashed_password=get_password_hash(user_in.password), # Хешируем!
+        hashed_password=await get_password_hash_async(user_in.password), # Хешируем (в пуле потоков)!
         full_name=user_in.full_name,
         phone=user_in.phone,
         role="client" # По умолчанию все - клиенты
     )
 
-    # 3. Сохраняем в БД
+    # 3. Сохраняем в БД (вместе с ответом для Idempotency-Key — в одной транзакции)
     db.add(new_user)
+    try:
+        await db.flush()
+    except IntegrityError:
+        # Тот же email успел записать параллельный запрос — возможно, повтор этого же
+        await db.rollback()
+        if idempotency_key:
+            replay = await idempotency.find_response(db, USERS_SCOPE, idempotency_key, request_fingerprint)
+            if replay is not None:
+                return replay
+        raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
+    if idempotency_key:
+        if not await idempotency.save_response(
+            db, USERS_SCOPE, idempotency_key, request_fingerprint, UserResponse.model_validate(new_user)
+        ):
+            return await idempotency.replay_after_race(db, USERS_SCOPE, idempotency_key, request_fingerprint)
     await db.commit()
     await db.refresh(new_user)
+    mark_write(response)
 
     return new_user
 # ... старый код create_user ...
@@ -45,4 +81,46 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     Возвращает профиль текущего пользователя.
     Доступно только с валидным токеном!
     """
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.get("/masters", response_model=list[MasterResponse])
+async def read_masters(db: AsyncSession = Depends(get_read_db)):
+    """Активные мастера: их id передаются в master_id при записи и в /appointments/slots/"""
+    result = await db.execute(
+        select(User.id, User.full_name)
+        .where(User.role == UserRole.MASTER.value, User.is_active.is_(True))
+        .order_by(User.id)
+    )
+    return [row._asdict() for row in result]
+
+@router.patch("/{user_id}/deactivate", response_model=UserResponse)
+async def deactivate_user(
+    user_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_admin: TokenData = Depends(get_current_admin)
+):
+    """
+    Заблокировать пользователя (только админ).
+    Версия токена увеличивается, а отзыв рассылается всем воркерам через NOTIFY: выданные ему
+    токены перестают работать сразу. Если LISTEN воркера в этот момент переподключался,
+    там админские эндпоинты откажут через USER_CACHE_TTL_SECONDS, остальные — когда истечёт токен.
+    """
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+
+    user.is_active = False
+    user.token_version += 1
+    await notify_tokens_revoked(db, user.id, user.token_version)
+    await db.commit()
+    await db.refresh(user)
+
+    # Здесь отзыв срабатывает сразу, остальные воркеры узнают о нём из NOTIFY
+    revoke_tokens(user.id, user.token_version)
+    user_cache.set(user.id, user)
+    if user.role == UserRole.MASTER.value:
+        master_roster.invalidate()
+    mark_write(response)
+    return user
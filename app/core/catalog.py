@@ -0,0 +1,83 @@
+import hashlib
+import time
+
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.service import Service
+from app.schemas.service import ServiceListAdapter, ServiceResponse
+
+SERVICE_COLUMNS = (
+    Service.id,
+    Service.name,
+    Service.price,
+    Service.duration_minutes,
+    Service.description,
+)
+
+
+class ServiceCatalog:
+    """
+    Каталог услуг в памяти воркера: список, поиск по id, готовый JSON и ETag.
+    create_service сбрасывает его сразу, остальные воркеры перечитают базу через TTL,
+    а если спросят неизвестный id — раньше, но не чаще раза в miss_reload секунд.
+    Читает всегда основную базу: каталог общий для всего воркера и живёт TTL, и отстающая
+    реплика сразу после сброса закэшировала бы старые данные на весь этот срок.
+    """
+
+    def __init__(self, ttl: float, miss_reload: float):
+        self.ttl = ttl
+        self.miss_reload = miss_reload
+        self.version = 0
+        self._loaded_at: float | None = None
+        self._load_started = float("-inf")
+        self._services: list[ServiceResponse] = []
+        self._by_id: dict[int, ServiceResponse] = {}
+        self.body = b"[]"
+        self.etag = ""
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._loaded_at = None
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def load(self) -> None:
+        version = self.version
+        self._load_started = time.monotonic()
+        # Только колонки ответа: без ORM-объектов и identity map
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(*SERVICE_COLUMNS).order_by(Service.id))
+            services = [ServiceResponse(**row._mapping) for row in result]
+        if version != self.version:
+            # Пока читали базу, каталог успели сбросить — эти данные уже могут быть старыми
+            return
+
+        self._services = services
+        self._by_id = {s.id: s for s in services}
+        self.body = ServiceListAdapter.dump_json(services)
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self._loaded_at = time.monotonic()
+
+    async def all(self) -> list[ServiceResponse]:
+        if not self._is_fresh():
+            await self.load()
+        return self._services
+
+    async def get(self, service_id: int) -> ServiceResponse | None:
+        if not self._is_fresh():
+            await self.load()
+        service = self._by_id.get(service_id)
+        if service is None and time.monotonic() - self._load_started >= self.miss_reload:
+            # Услугу могли только что создать в другом воркере. Перечитываем весь каталог,
+            # но не чаще раза в miss_reload: поток несуществующих id не должен грузить базу
+            await self.load()
+            service = self._by_id.get(service_id)
+        return service
+
+
+service_catalog = ServiceCatalog(
+    ttl=settings.SERVICE_CATALOG_TTL_SECONDS, miss_reload=settings.SERVICE_CATALOG_MISS_RELOAD_SECONDS
+)
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator
+
+from sqlalchemy import and_, select
+
+from app.core.config import settings
+from app.db.session import ReadSessionLocal
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.models.user import User
+
+# Колонки выгрузки (и заголовок CSV)
+EXPORT_COLUMNS = [
+    Appointment.id,
+    Appointment.time_start,
+    Appointment.time_end,
+    Appointment.status,
+    Appointment.client_id,
+    Appointment.master_id,
+    User.full_name.label("client_name"),
+    User.email.label("client_email"),
+    User.phone.label("client_phone"),
+    Appointment.service_id,
+    Service.name.label("service_name"),
+    Service.price.label("service_price"),
+    Service.duration_minutes.label("service_duration_minutes"),
+]
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+def _export_query(range_start: datetime, range_end: datetime):
+    return (
+        select(*EXPORT_COLUMNS)
+        .join(User, User.id == Appointment.client_id)
+        .join(Service, Service.id == Appointment.service_id)
+        .where(
+            and_(
+                Appointment.time_start >= range_start,
+                Appointment.time_start < range_end,
+            )
+        )
+        .order_by(Appointment.time_start, Appointment.id)
+        .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _ndjson_chunk(rows) -> bytes:
+    return "".join(
+        json.dumps(row._asdict(), default=_json_default, ensure_ascii=False) + "\n"
+        for row in rows
+    ).encode()
+
+
+def _csv_chunk(rows, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def stream_appointments(
+    range_start: datetime, range_end: datetime, export_format: str
+) -> AsyncIterator[bytes]:
+    """
+    Выгрузка записей с клиентом и услугой через серверный курсор:
+    в памяти всегда не больше одной пачки EXPORT_BATCH_SIZE строк.
+    Сессия своя — генератор работает уже после выхода из хендлера.
+    """
+    if export_format == "csv":
+        yield _csv_chunk([], header=True)
+
+    async with ReadSessionLocal() as session:
+        result = await session.stream(_export_query(range_start, range_end))
+        async for rows in result.partitions():
+            if export_format == "csv":
+                yield _csv_chunk(rows)
+            else:
+                yield _ndjson_chunk(rows)
@@ -0,0 +1,90 @@
+import hashlib
+import hmac
+from datetime import timedelta
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.db.session import mark_write
+from app.models.idempotency_key import IdempotencyKey
+
+# Заголовок, по которому клиент видит, что ответ — повтор сохранённого
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Просроченные ключи удаляются раз в PRUNE_EVERY сохранений
+PRUNE_EVERY = 1000
+
+_saved = 0
+
+
+def fingerprint(payload: BaseModel) -> str:
+    """HMAC тела запроса (в нём может быть пароль — поэтому не голый sha256)."""
+    body = payload.model_dump_json().encode()
+    return hmac.new(settings.SECRET_KEY.encode(), body, hashlib.sha256).hexdigest()
+
+
+async def find_response(db: AsyncSession, scope: str, key: str, request_fingerprint: str) -> FastJSONResponse | None:
+    """
+    Сохранённый ответ на этот ключ (один поиск по первичному ключу) или None.
+    Тот же ключ с другим телом запроса — 422.
+    """
+    result = await db.execute(
+        select(IdempotencyKey.fingerprint, IdempotencyKey.status_code, IdempotencyKey.response).where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > func.now(),
+        )
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    if not hmac.compare_digest(row.fingerprint, request_fingerprint):
+        raise HTTPException(status_code=422, detail="Idempotency-Key został już użyty z innym żądaniem")
+    response = FastJSONResponse(row.response, status_code=row.status_code, headers={REPLAYED_HEADER: "true"})
+    mark_write(response)
+    return response
+
+
+async def save_response(
+    db: AsyncSession, scope: str, key: str, request_fingerprint: str, body: BaseModel, status_code: int = 200
+) -> bool:
+    """
+    Запомнить успешный ответ в той же транзакции, что и сама запись: ключ появится только вместе с ней.
+    Просроченный ключ перезаписывается. False — живой ключ уже сохранил параллельный такой же запрос
+    (INSERT ждёт его COMMIT), тогда свою транзакцию надо откатить и отдать его ответ (replay_after_race).
+    """
+    global _saved
+    values = {
+        "scope": scope,
+        "key": key,
+        "fingerprint": request_fingerprint,
+        "status_code": status_code,
+        "response": body.model_dump(mode="json"),
+        "expires_at": func.now() + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+    }
+    statement = insert(IdempotencyKey).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+        set_={name: statement.excluded[name] for name in values if name not in ("scope", "key")},
+        where=IdempotencyKey.expires_at <= func.now(),
+    ).returning(IdempotencyKey.key)
+    saved = (await db.execute(statement)).first() is not None
+
+    _saved += 1
+    if _saved % PRUNE_EVERY == 0:
+        await db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= func.now()))
+    return saved
+
+
+async def replay_after_race(db: AsyncSession, scope: str, key: str, request_fingerprint: str) -> FastJSONResponse:
+    """Откатить свою транзакцию и отдать ответ параллельного запроса с тем же ключом."""
+    await db.rollback()
+    response = await find_response(db, scope, key, request_fingerprint)
+    if response is None:
+        raise HTTPException(status_code=409, detail="Żądanie z tym Idempotency-Key jest właśnie przetwarzane")
+    return response
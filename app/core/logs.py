@@ -0,0 +1,141 @@
+import logging
+import queue
+import random
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+import orjson
+
+from app.core.config import settings
+from app.db.session import TimedQueuePool
+
+# Запрос, в рамках которого пишется строка лога: id (заголовок X-Request-ID) и "GET /path"
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+request_route: ContextVar[str | None] = ContextVar("request_route", default=None)
+
+sql_logger = logging.getLogger("app.sql")
+access_logger = logging.getLogger("app.access")
+
+# Стандартные поля LogRecord — всё остальное (extra=...) попадает в JSON отдельными ключами
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "request_id", "route"}
+
+_listener: QueueListener | None = None
+_previous_handlers: list[logging.Handler] = []
+
+
+def sampled(rate: float) -> bool:
+    """Писать ли эту строку: rate=1 — всегда, 0 — никогда. Решаем до создания LogRecord."""
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+class RequestContextFilter(logging.Filter):
+    """Добавляет к записи request_id и route текущего запроса (в потоке event loop, до очереди)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id.get()
+        record.route = request_route.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна строка JSON на запись: время, уровень, логгер, сообщение, запрос и поля из extra."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+            entry["route"] = record.route
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry, default=str).decode()
+
+
+class TextFormatter(logging.Formatter):
+    """Для разработки: обычная строка, request_id в квадратных скобках."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.__dict__.setdefault("request_id", None)
+        return super().format(record)
+
+
+def setup_logging() -> None:
+    """
+    Все логи приложения — через очередь: в event loop запись только кладётся в queue.SimpleQueue,
+    а форматирование и запись в stdout делает отдельный поток QueueListener.
+    Повторный вызов ничего не делает.
+    """
+    global _listener, _previous_handlers
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    handler = QueueHandler(log_queue)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    _previous_handlers = root.handlers
+    root.handlers = [handler]
+    root.setLevel(settings.LOG_LEVEL)
+    # Свои строки SQL и access-лога пишем сами, с выборкой; echo и access-лог uvicorn не нужны
+    logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
+    logging.getLogger(f"{TimedQueuePool.__module__}.{TimedQueuePool.__name__}").setLevel(logging.WARNING)
+    logging.getLogger("uvicorn.access").disabled = True
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Дописать очередь в stdout, остановить поток и вернуть прежние обработчики (при остановке воркера)."""
+    global _listener
+    if _listener is not None:
+        logging.getLogger().handlers = _previous_handlers
+        _listener.stop()
+        _listener = None
+
+
+def log_sql(statement: str, seconds: float, error: BaseException | None = None) -> None:
+    """
+    SQL-запрос: медленные (LOG_SLOW_SQL_MS) — всегда, остальные — с долей LOG_SQL_SAMPLE_RATE.
+    Упавшие тоже сюда: запрос, снятый statement_timeout, — как раз самый медленный.
+    """
+    duration_ms = round(seconds * 1000, 1)
+    extra = {"duration_ms": duration_ms}
+    outcome = ""
+    if error is not None:
+        # SQLSTATE говорит больше имени класса: 57014 — statement_timeout, 23P01 — накладка визитов
+        extra["error"] = getattr(error, "sqlstate", None) or type(error).__name__
+        outcome = f" (failed: {extra['error']})"
+    if settings.LOG_SLOW_SQL_MS and duration_ms >= settings.LOG_SLOW_SQL_MS:
+        sql_logger.warning("Slow SQL %.1f ms%s: %s", duration_ms, outcome, statement, extra=extra)
+    elif sampled(settings.LOG_SQL_SAMPLE_RATE):
+        sql_logger.info("SQL %.1f ms%s: %s", duration_ms, outcome, statement, extra=extra)
+
+
+def log_access(method: str, path: str, status: int, seconds: float, queries: int) -> None:
+    """Строка access-лога: ошибки 5xx — всегда, остальные — с долей LOG_ACCESS_SAMPLE_RATE."""
+    if status < 500 and not sampled(settings.LOG_ACCESS_SAMPLE_RATE):
+        return
+    duration_ms = round(seconds * 1000, 1)
+    access_logger.log(
+        logging.ERROR if status >= 500 else logging.INFO,
+        "%s %s %d %.1f ms",
+        method, path, status, duration_ms,
+        extra={"status": status, "duration_ms": duration_ms, "queries": queries},
+    )
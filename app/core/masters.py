@@ -0,0 +1,55 @@
+import time
+
+from sqlalchemy import and_
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.user import User, UserRole
+
+
+class MasterRoster:
+    """
+    Список активных мастеров (кресел) в памяти воркера.
+    Пока мастеров нет, вся парикмахерская — одно кресло без мастера (master_id = None).
+    Как и каталог услуг, перечитывается из основной базы, а не с реплики.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._loaded_at: float | None = None
+        self._ids: list[int] = []
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._loaded_at = None
+
+    async def ids(self) -> list[int]:
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return self._ids
+        version = self.version
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(User.id)
+                .where(and_(User.role == UserRole.MASTER.value, User.is_active.is_(True)))
+                .order_by(User.id)
+            )
+            ids = list(result.scalars())
+        if version == self.version:
+            self._ids = ids
+            self._loaded_at = time.monotonic()
+        return ids
+
+    async def chairs(self, master_id: int | None = None) -> list[int | None] | None:
+        """
+        Кресла, по которым считать: [master_id], все мастера, если master_id не задан,
+        или [None] в режиме одного кресла. None — такого мастера нет.
+        """
+        ids = await self.ids()
+        if master_id is None:
+            return ids or [None]
+        return [master_id] if master_id in ids else None
+
+
+master_roster = MasterRoster(ttl=settings.SERVICE_CATALOG_TTL_SECONDS)
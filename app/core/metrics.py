@@ -0,0 +1,193 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.logs import log_sql
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Сколько SQL-запросов одного HTTP-запроса запоминать для лога медленных запросов
+MAX_LOGGED_STATEMENTS = 50
+
+
+class RequestStats:
+    """SQL одного HTTP-запроса: сколько запросов, сколько времени в базе, какие именно."""
+
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: list[tuple[float, str]] = []
+
+
+current_request_stats: ContextVar[RequestStats | None] = ContextVar("current_request_stats", default=None)
+
+
+class Histogram:
+    """Гистограмма в формате Prometheus (кумулятивные корзины + сумма + количество)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Последняя — +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+# (method, handler, status) -> гистограмма задержек; (method, handler) -> SQL на запрос
+request_latency: dict[tuple[str, str, int], Histogram] = {}
+request_db_queries: dict[tuple[str, str], Histogram] = {}
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+db_queries_total = 0
+db_seconds_total = 0.0
+db_query_errors_total = 0
+# Сколько занял старт воркера (lifespan до приёма запросов), секунды
+startup_seconds = 0.0
+
+
+def observe_request(method: str, handler: str, status: int, seconds: float, stats: RequestStats) -> None:
+    request_latency.setdefault((method, handler, status), Histogram()).observe(seconds)
+    request_db_queries.setdefault((method, handler), Histogram(QUERY_COUNT_BUCKETS)).observe(stats.queries)
+
+
+def server_timing(seconds: float, stats: RequestStats) -> str:
+    """Значение заголовка Server-Timing (видно во вкладке Network браузера)."""
+    return (
+        f'app;dur={seconds * 1000:.1f}, '
+        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"'
+    )
+
+
+def log_if_slow(method: str, path: str, seconds: float, stats: RequestStats, threshold_ms: int) -> None:
+    if not threshold_ms or seconds * 1000 < threshold_ms:
+        return
+    statements = "\n".join(f"  [{duration * 1000:.1f} ms] {sql}" for duration, sql in stats.statements)
+    logger.warning(
+        "Slow request %s %s: %.1f ms, %d queries, %.1f ms in DB\n%s",
+        method, path, seconds * 1000, stats.queries, stats.db_seconds * 1000, statements,
+    )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _finish_statement(conn, statement: str) -> float | None:
+    """Снять время начала запроса с соединения и учесть его; None — запрос не начинался."""
+    global db_queries_total, db_seconds_total
+    starts = conn.info.get("query_start")
+    if not starts:
+        return None
+    elapsed = time.perf_counter() - starts.pop()
+    db_queries_total += 1
+    db_seconds_total += elapsed
+
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if len(stats.statements) < MAX_LOGGED_STATEMENTS:
+            stats.statements.append((elapsed, statement))
+    return elapsed
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = _finish_statement(conn, statement)
+    if elapsed is not None:
+        log_sql(statement, elapsed)
+
+
+def _handle_error(context) -> None:
+    """
+    Упавший запрос (например, 23P01 от ex_<партиция>_no_overlap, на котором create_appointment
+    пробует следующего мастера): after_cursor_execute не вызывается, поэтому время снимаем здесь —
+    иначе оно навсегда осталось бы в conn.info соединения из пула.
+    """
+    global db_query_errors_total
+    if context.connection is None:
+        return
+    statement = context.statement or ""
+    elapsed = _finish_statement(context.connection, statement)
+    if elapsed is not None:
+        db_query_errors_total += 1
+        log_sql(statement, elapsed, context.original_exception)
+
+
+def install_sql_hooks(engine: AsyncEngine) -> None:
+    """Считаем каждый SQL-запрос движка (события SQLAlchemy на sync_engine)."""
+    if event.contains(engine.sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return  # Уже установлены (create_app вызвали ещё раз)
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render_prometheus(pools: dict[str, dict]) -> str:
+    """Все метрики воркера в текстовом формате Prometheus."""
+    lines = [
+        "# HELP http_request_duration_seconds Request latency by handler.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, handler, status), histogram in sorted(request_latency.items()):
+        labels = f'method="{method}",handler="{_escape(handler)}",status="{status}"'
+        lines += histogram.render("http_request_duration_seconds", labels)
+
+    lines += [
+        "# HELP http_request_db_queries SQL statements per request by handler.",
+        "# TYPE http_request_db_queries histogram",
+    ]
+    for (method, handler), histogram in sorted(request_db_queries.items()):
+        labels = f'method="{method}",handler="{_escape(handler)}"'
+        lines += histogram.render("http_request_db_queries", labels)
+
+    lines += [
+        "# HELP db_queries_total SQL statements executed.",
+        "# TYPE db_queries_total counter",
+        f"db_queries_total {db_queries_total}",
+        "# HELP db_query_seconds_total Time spent in SQL statements.",
+        "# TYPE db_query_seconds_total counter",
+        f"db_query_seconds_total {db_seconds_total:.6f}",
+        "# HELP db_query_errors_total SQL statements that failed (constraint violations, timeouts).",
+        "# TYPE db_query_errors_total counter",
+        f"db_query_errors_total {db_query_errors_total}",
+        "# HELP app_startup_seconds Worker startup (warm-up) duration.",
+        "# TYPE app_startup_seconds gauge",
+        f"app_startup_seconds {startup_seconds:.6f}",
+    ]
+
+    for key in ("checked_out", "checked_in", "overflow", "size", "wait_count", "wait_seconds_total"):
+        metric = f"db_pool_{key}"
+        lines.append(f"# TYPE {metric} gauge")
+        for pool_name, stats in pools.items():
+            if key in stats:
+                lines.append(f'{metric}{{pool="{pool_name}"}} {stats[key]}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,51 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+
+# Заголовок, в котором отдаём курсор следующей страницы (тело ответа остаётся списком)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+INT4_LIMIT = 2 ** 31
+
+
+def encode_cursor(*values) -> str:
+    """Непрозрачный курсор из значений ключа последней строки страницы."""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _cursor_value(value, expected: type):
+    """Значение курсора нужного типа или ValueError."""
+    if expected is datetime:
+        if not isinstance(value, str):
+            raise ValueError(value)
+        value = datetime.fromisoformat(value)
+        if value.tzinfo is not None:  # time_start в базе без пояса
+            raise ValueError(value)
+        return value
+    # bool — тоже int, но в ключе страницы его быть не может
+    if not isinstance(value, expected) or isinstance(value, bool):
+        raise ValueError(value)
+    if expected is int and not -INT4_LIMIT <= value < INT4_LIMIT:  # id — integer в базе
+        raise ValueError(value)
+    return value
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    """
+    Обратно в список значений типов types (datetime — из isoformat, без часового пояса).
+    Кривой или подделанный курсор — 400, а не ошибка при сравнении или в запросе к базе.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(values)
+        return [_cursor_value(value, expected) for value, expected in zip(values, types)]
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Nieprawidłowy kursor")
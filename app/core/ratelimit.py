@@ -0,0 +1,164 @@
+import time
+from contextlib import contextmanager
+from typing import Iterator, Protocol
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import engine
+
+# Сколько помнить бакет в памяти: за это время любой бакет всё равно успевает наполниться
+BUCKET_IDLE_SECONDS = 3600
+# Postgres-бакеты без обращений дольше этого удаляются (раз в PRUNE_EVERY вызовов)
+PRUNE_EVERY = 1000
+
+
+class BucketStore(Protocol):
+    async def take(self, key: str, capacity: float, per_second: float, cost: float = 1) -> float:
+        """Списать cost токенов. 0 — можно, иначе через сколько секунд появятся токены."""
+
+
+def _retry_after(tokens: float, cost: float, per_second: float) -> float:
+    return (cost - tokens) / per_second
+
+
+class MemoryBucketStore:
+    """Бакеты в памяти воркера (у каждого воркера uvicorn — свои)."""
+
+    def __init__(self, maxsize: int = 100_000):
+        # key -> (токены, время последнего обновления)
+        self._buckets = TTLCache(maxsize=maxsize, ttl=BUCKET_IDLE_SECONDS)
+
+    async def take(self, key: str, capacity: float, per_second: float, cost: float = 1) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * per_second)
+        if tokens < cost:
+            self._buckets.set(key, (tokens, now))
+            return _retry_after(tokens, cost, per_second)
+        self._buckets.set(key, (tokens - cost, now))
+        return 0.0
+
+
+class PostgresBucketStore:
+    """
+    Бакеты в таблице rate_limit_buckets — одно состояние на все воркеры и машины.
+    Строка бакета блокируется (FOR UPDATE) на время пересчёта, так что параллельные
+    попытки не спишут один и тот же токен дважды.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self._calls = 0
+
+    async def take(self, key: str, capacity: float, per_second: float, cost: float = 1) -> float:
+        params = {"key": key, "capacity": capacity, "per_second": per_second, "cost": cost}
+        async with self.engine.begin() as conn:
+            await conn.execute(
+                text(
+                    """
+                    INSERT INTO rate_limit_buckets (key, tokens, updated_at)
+                    VALUES (:key, :capacity, clock_timestamp())
+                    ON CONFLICT (key) DO NOTHING
+                    """
+                ),
+                params,
+            )
+            result = await conn.execute(
+                text(
+                    """
+                    UPDATE rate_limit_buckets AS b
+                    SET tokens = CASE WHEN r.tokens >= :cost THEN r.tokens - :cost ELSE r.tokens END,
+                        updated_at = clock_timestamp()
+                    FROM (
+                        SELECT key, least(
+                            :capacity,
+                            tokens + extract(epoch FROM clock_timestamp() - updated_at) * :per_second
+                        ) AS tokens
+                        FROM rate_limit_buckets
+                        WHERE key = :key
+                        FOR UPDATE
+                    ) AS r
+                    WHERE b.key = r.key
+                    RETURNING r.tokens
+                    """
+                ),
+                params,
+            )
+            tokens = result.scalar_one()
+
+            self._calls += 1
+            if self._calls % PRUNE_EVERY == 0:
+                await conn.execute(
+                    text(
+                        "DELETE FROM rate_limit_buckets "
+                        "WHERE updated_at < clock_timestamp() - make_interval(secs => :idle)"
+                    ),
+                    {"idle": BUCKET_IDLE_SECONDS},
+                )
+        return 0.0 if tokens >= cost else _retry_after(tokens, cost, per_second)
+
+
+class RateLimiter:
+    """Token bucket: burst попыток подряд, дальше per_minute в минуту."""
+
+    def __init__(self, store: BucketStore, name: str, burst: int, per_minute: float):
+        self.store = store
+        self.name = name
+        self.burst = burst
+        self.per_second = per_minute / 60
+
+    async def check(self, key: str) -> None:
+        """429 с Retry-After, если бакет пуст."""
+        retry_after = await self.store.take(f"{self.name}:{key}", self.burst, self.per_second)
+        if retry_after:
+            seconds = max(1, round(retry_after))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Zbyt wiele prób logowania. Spróbuj ponownie za {seconds} s",
+                headers={"Retry-After": str(seconds)},
+            )
+
+
+class AdmissionGate:
+    """
+    Не больше limit одновременных дорогих операций на воркер. Лишние не ждут в очереди,
+    а сразу получают 503: клиент повторит позже, а очередь не съест память и таймауты.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+        self.rejected = 0
+
+    @contextmanager
+    def admit(self) -> Iterator[None]:
+        if self.in_flight >= self.limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Serwer jest przeciążony. Spróbuj ponownie za chwilę",
+                headers={"Retry-After": "1"},
+            )
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+
+
+def _login_store() -> BucketStore:
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "postgres":
+        return PostgresBucketStore(engine)
+    return MemoryBucketStore()
+
+
+_store = _login_store()
+login_ip_limiter = RateLimiter(_store, "login:ip", settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE)
+login_account_limiter = RateLimiter(
+    _store, "login:account", settings.LOGIN_ACCOUNT_BURST, settings.LOGIN_ACCOUNT_PER_MINUTE
+)
+password_gate = AdmissionGate(settings.LOGIN_MAX_IN_FLIGHT)
@@ -0,0 +1,30 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON через orjson: быстрее стандартного json и сам понимает datetime/date."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def trusted_response(
+    content: Any,
+    adapter: TypeAdapter | None = None,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> FastJSONResponse:
+    """
+    Для своих данных, которые уже собраны ровно по схеме ответа (например, из выборки колонок):
+    отдаём сразу через orjson, минуя jsonable_encoder и повторную валидацию response_model.
+    С VALIDATE_TRUSTED_RESPONSES=true (для разработки и тестов) данные всё-таки проверяются схемой.
+    """
+    if adapter is not None and settings.VALIDATE_TRUSTED_RESPONSES:
+        adapter.validate_python(content)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -1,18 +1,20 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any
 from jose import jwt
 from passlib.context import CryptContext
-import os
-from dotenv import load_dotenv
+from app.core.config import settings
 
-load_dotenv()
+# Хеши со старой стоимостью помечаются как устаревшие (needs_update) и пересчитываются при входе
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
-# Настройки из .env
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt отпускает GIL, поэтому хватает пула потоков: event loop не блокируется,
+# а число одновременных хеширований ограничено размером пула
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt",
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -20,6 +22,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль в пуле потоков.
+    Возвращает (верен ли пароль, новый хеш или None, если пересчитывать не нужно).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+async def get_password_hash_async(password: str) -> str:
+    """Хеширует пароль в пуле потоков."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, pwd_context.hash, password)
+
+async def warm_up_hashing() -> None:
+    """
+    Один хеш в пуле потоков при старте: passlib выбирает и проверяет backend bcrypt
+    при первом использовании, и платить за это должен не первый логин после деплоя.
+    """
+    await get_password_hash_async("warm-up")
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     """Создает JWT токен (электронный пропуск)."""
     to_encode = data.copy()
@@ -29,5 +53,5 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
         expire = datetime.utcnow() + timedelta(minutes=15)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
\ No newline at end of file
@@ -0,0 +1,57 @@
+import time
+from datetime import date
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class SlotCache:
+    """
+    Посчитанные свободные слоты по (день, service_id, master_id) в памяти воркера
+    (master_id = None — «любой мастер»).
+    День целиком выбрасывается, когда в нём что-то меняется (NOTIFY от любого воркера).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, settle_seconds: float):
+        self._days = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Когда день менялся в последний раз: сразу после изменения реплика может отставать,
+        # и результат, прочитанный с неё, класть в кэш нельзя
+        self._changed_at: dict[date, float] = {}
+        self.settle_seconds = settle_seconds
+        # Растёт при каждом сбросе: если сброс случился, пока мы считали слоты, результат не кладём
+        self.epoch = 0
+
+    def get(self, day: date, service_id: int, master_id: int | None = None) -> list[str] | None:
+        services = self._days.get(day)
+        return None if services is None else services.get((service_id, master_id))
+
+    def set(self, day: date, service_id: int, master_id: int | None, slots: list[str], epoch: int) -> None:
+        """epoch — значение self.epoch, взятое до чтения из базы."""
+        if epoch != self.epoch:
+            return
+        changed_at = self._changed_at.get(day)
+        if changed_at is not None:
+            if time.monotonic() - changed_at < self.settle_seconds:
+                return
+            del self._changed_at[day]
+        services = self._days.get(day)
+        if services is None:
+            services = {}
+            self._days.set(day, services)
+        services[(service_id, master_id)] = slots
+
+    def evict_day(self, day: date | None) -> None:
+        """Сбросить один день; None — сбросить всё (например, слушатель переподключался)."""
+        self.epoch += 1
+        if day is None:
+            self._days.clear()
+            return
+        self._days.pop(day)
+        self._changed_at[day] = time.monotonic()
+
+
+slot_cache = SlotCache(
+    maxsize=settings.SLOT_CACHE_SIZE,
+    ttl=settings.SLOT_CACHE_TTL_SECONDS,
+    settle_seconds=settings.READ_YOUR_WRITES_SECONDS if settings.READ_REPLICA_URL else 0,
+)
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+# (service_id, master_id) — на что подписан клиент в пределах дня; master_id = None — «любой мастер»
+FeedKey = tuple[int, int | None]
+# Загрузка слотов дня сразу для нескольких ключей (один запрос занятости на день)
+SlotLoader = Callable[[date, list[FeedKey]], Awaitable[dict[FeedKey, list[str]]]]
+
+
+class Subscriber:
+    """Один подключённый клиент: очередь событий ("snapshot" | "diff", данные)."""
+
+    __slots__ = ("queue",)
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue[tuple[str, dict]] = asyncio.Queue(maxsize=queue_size)
+
+
+class SlotFeedHub:
+    """
+    Раздача изменений свободных слотов подписчикам SSE, один хаб на воркер.
+    На изменение дня (NOTIFY от любого воркера) слоты дня пересчитываются один раз для всех ключей,
+    и каждому подписчику уходит только разница. Простаивающий подписчик — это только очередь.
+    """
+
+    def __init__(self, load: SlotLoader, queue_size: int):
+        self.load = load
+        self.queue_size = queue_size
+        self._subscribers: dict[date, dict[FeedKey, set[Subscriber]]] = {}
+        self._slots: dict[tuple[date, FeedKey], list[str]] = {}
+        # Замок дня и сколько корутин его держат или ждут: удаляется, только когда не нужен никому,
+        # иначе новый подписчик получил бы второй замок на тот же день
+        self._locks: dict[date, tuple[asyncio.Lock, int]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return sum(len(subs) for keys in self._subscribers.values() for subs in keys.values())
+
+    @asynccontextmanager
+    async def _day_lock(self, day: date):
+        """Пересчёт и первая загрузка одного дня — по очереди."""
+        lock, users = self._locks.get(day, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[day] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[day]
+            if users == 1:
+                del self._locks[day]
+            else:
+                self._locks[day] = (lock, users - 1)
+
+    async def subscribe(self, day: date, key: FeedKey) -> tuple[Subscriber, list[str]]:
+        """Регистрирует подписчика и возвращает текущие слоты (общие для всех подписчиков ключа)."""
+        subscriber = Subscriber(self.queue_size)
+        async with self._day_lock(day):
+            self._subscribers.setdefault(day, {}).setdefault(key, set()).add(subscriber)
+            slots = self._slots.get((day, key))
+            if slots is None:
+                try:
+                    slots = (await self.load(day, [key]))[key]
+                except BaseException:
+                    self.unsubscribe(day, key, subscriber)
+                    raise
+                self._slots[(day, key)] = slots
+        return subscriber, slots
+
+    def unsubscribe(self, day: date, key: FeedKey, subscriber: Subscriber) -> None:
+        keys = self._subscribers.get(day)
+        if keys is None:
+            return
+        subscribers = keys.get(key)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del keys[key]
+                self._slots.pop((day, key), None)
+        if not keys:
+            del self._subscribers[day]
+
+    def day_changed(self, day: date | None) -> None:
+        """Колбэк DayChangeListener: None — пересчитать все дни с подписчиками (после переподключения)."""
+        days = list(self._subscribers) if day is None else [day] if day in self._subscribers else []
+        for changed_day in days:
+            task = asyncio.create_task(self._refresh(changed_day))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _refresh(self, day: date) -> None:
+        if day not in self._subscribers:
+            return
+        async with self._day_lock(day):
+            keys = list(self._subscribers.get(day, {}))
+            if not keys:
+                return
+            try:
+                fresh = await self.load(day, keys)
+            except Exception:
+                logger.exception("Slot feed refresh for %s failed", day)
+                return
+            for key in keys:
+                subscribers = self._subscribers.get(day, {}).get(key)
+                old = self._slots.get((day, key))
+                new = fresh[key]
+                if not subscribers or old is None:
+                    continue
+                self._slots[(day, key)] = new
+                old_set, new_set = set(old), set(new)
+                diff = {
+                    "added": sorted(new_set - old_set),
+                    "removed": sorted(old_set - new_set),
+                }
+                if not diff["added"] and not diff["removed"]:
+                    continue
+                for subscriber in subscribers:
+                    snapshot = {"date": day.isoformat(), "available_slots": new}  # Как первый snapshot
+                    self._publish(subscriber, ("diff", diff), ("snapshot", snapshot))
+
+    @staticmethod
+    def _publish(subscriber: Subscriber, event: tuple[str, dict], snapshot: tuple[str, dict]) -> None:
+        """
+        Медленный клиент, у которого очередь переполнена, не тормозит остальных:
+        его очередь сбрасывается и заменяется одним полным снимком.
+        """
+        try:
+            subscriber.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(snapshot)
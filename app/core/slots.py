@@ -0,0 +1,145 @@
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.appointment import Appointment
+
+# --- КОНСТАНТЫ РАБОЧЕГО ДНЯ ---
+WORK_START_HOUR = 10
+WORK_END_HOUR = 20
+SLOT_STEP = timedelta(minutes=30)
+
+Interval = tuple[datetime, datetime]
+
+
+def merge_intervals(intervals: Iterable[Interval]) -> list[Interval]:
+    """Сортирует занятые интервалы один раз и склеивает пересекающиеся."""
+    merged: list[Interval] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def has_overlap(merged: list[Interval], start: datetime, end: datetime) -> bool:
+    """Пересекается ли [start, end) с каким-нибудь занятым интервалом (бинарный поиск)."""
+    # Первый интервал, который заканчивается строго после start
+    i = bisect_right(merged, start, key=lambda interval: interval[1])
+    return i < len(merged) and merged[i][0] < end
+
+
+def work_window(day: date) -> Interval:
+    """Начало и конец рабочего дня."""
+    day_start = datetime.combine(day, datetime.min.time())
+    return (
+        day_start.replace(hour=WORK_START_HOUR),
+        day_start.replace(hour=WORK_END_HOUR),
+    )
+
+
+def free_slots(
+    merged: list[Interval],
+    window: Interval,
+    duration: timedelta,
+    step: timedelta = SLOT_STEP,
+) -> list[datetime]:
+    """
+    Проходит по промежуткам между занятыми интервалами и
+    возвращает все начала слотов (кратные step от начала окна), куда влезает услуга.
+    """
+    work_start, work_end = window
+    slots: list[datetime] = []
+    gap_start = work_start
+    for busy_start, busy_end in [*merged, (work_end, work_end)]:
+        gap_end = min(busy_start, work_end)
+        if gap_end > gap_start:
+            # Первый слот сетки, который не раньше начала промежутка
+            steps = -((work_start - gap_start) // step)
+            slot = work_start + steps * step
+            while slot + duration <= gap_end:
+                slots.append(slot)
+                slot += step
+        if busy_end > gap_start:
+            gap_start = busy_end
+        if gap_start >= work_end:
+            break
+    return slots
+
+
+def appointment_intervals(appointments) -> list[Interval]:
+    """Занятые интервалы из записей (time_start, time_end)."""
+    return [(appt.time_start, appt.time_end) for appt in appointments]
+
+
+def group_by_day(intervals: Iterable[Interval]) -> dict[date, list[Interval]]:
+    """Раскладывает интервалы по дням начала (для расчёта нескольких дней за один запрос)."""
+    days: dict[date, list[Interval]] = {}
+    for interval in intervals:
+        days.setdefault(interval[0].date(), []).append(interval)
+    return days
+
+
+def group_by_master(rows) -> dict[int | None, list[Interval]]:
+    """Раскладывает строки (master_id, time_start, time_end) по мастерам."""
+    masters: dict[int | None, list[Interval]] = {}
+    for master_id, time_start, time_end in rows:
+        masters.setdefault(master_id, []).append((time_start, time_end))
+    return masters
+
+
+def chair_busy(busy_by_master: dict, chair: int | None) -> list[Interval]:
+    """
+    Занятость одного кресла. Запись без мастера (master_id = None) занимает все кресла сразу;
+    в режиме одного кресла (chair = None) заняты все записи, к какому бы мастеру они ни были.
+    Так же считает и ограничение ex_<партиция>_no_overlap в базе.
+    """
+    if chair is None:
+        return [interval for intervals in busy_by_master.values() for interval in intervals]
+    return [*busy_by_master.get(chair, []), *busy_by_master.get(None, [])]
+
+
+def free_slots_any(
+    busy_by_master: dict,
+    masters: Iterable,
+    window: Interval,
+    duration: timedelta,
+    step: timedelta = SLOT_STEP,
+) -> list[datetime]:
+    """Слоты, свободные хотя бы у одного мастера: у каждого считаем отдельно и объединяем."""
+    slots: set[datetime] = set()
+    for master_id in masters:
+        busy = merge_intervals(chair_busy(busy_by_master, master_id))
+        slots.update(free_slots(busy, window, duration, step))
+    return sorted(slots)
+
+
+def master_filter(master_id: int):
+    """Записи мастера master_id и записи без мастера — они занимают всех мастеров сразу."""
+    return or_(Appointment.master_id == master_id, Appointment.master_id.is_(None))
+
+
+async def busy_intervals(
+    db: AsyncSession, range_start: datetime, range_end: datetime, master_id: int | None = None
+):
+    """
+    Занятые интервалы (master_id, time_start, time_end) за период одним запросом, без ORM-объектов.
+    С master_id — только день этого мастера и записи без мастера (индекс ix_appointments_master_id_time_start).
+    """
+    query = select(Appointment.master_id, Appointment.time_start, Appointment.time_end).where(
+        and_(
+            Appointment.time_start >= range_start,
+            Appointment.time_start < range_end,
+            Appointment.status != "cancelled"
+        )
+    )
+    if master_id is not None:
+        query = query.where(master_filter(master_id))
+    result = await db.execute(query)
+    return result.all()
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+from sqlalchemy.future import select
+
+from app.core.catalog import SERVICE_COLUMNS, service_catalog
+from app.core.masters import master_roster
+from app.core.security import warm_up_hashing
+from app.core.slots import busy_intervals
+from app.models.service import Service
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+async def _prepare_hot_statements(conn: AsyncConnection) -> None:
+    """
+    Выполняет горячие запросы ровно в том виде, в каком их строят хендлеры: asyncpg кэширует
+    подготовленные запросы по тексту SQL на каждом соединении, заодно подгружает типы.
+    """
+    async with AsyncSession(bind=conn) as db:
+        day_start = datetime.combine(date.today(), datetime.min.time())
+        day_end = day_start + timedelta(days=1)
+        await db.execute(select(*SERVICE_COLUMNS).order_by(Service.id))  # Каталог услуг
+        await db.execute(select(Service).where(Service.id == 0))  # Услуга по id
+        await busy_intervals(db, day_start, day_end)  # День всех мастеров
+        await busy_intervals(db, day_start, day_end, master_id=0)  # День одного мастера
+        await db.execute(select(User).where(User.email == ""))  # Пользователь по email (логин)
+        await db.execute(select(User).where(User.id == 0))  # Пользователь по id (кэш deps)
+
+
+async def warm_pool(engine: AsyncEngine, connections: int) -> int:
+    """
+    Открывает connections соединений одновременно (иначе пул выдаст одно и то же)
+    и готовит на каждом горячие запросы. Возвращает, сколько соединений удалось прогреть.
+    """
+    async def warm_one() -> None:
+        async with engine.connect() as conn:
+            await _prepare_hot_statements(conn)
+            await conn.rollback()
+
+    results = await asyncio.gather(*(warm_one() for _ in range(connections)), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if errors:
+        # База недоступна — стартуем без прогрева, соединения откроются по требованию
+        logger.warning("Pool warm-up failed on %d of %d connections: %r", len(errors), connections, errors[0])
+    return connections - len(errors)
+
+
+async def warm_up(engines: list[AsyncEngine], connections: int) -> dict[str, float]:
+    """Прогрев воркера до приёма запросов: пулы, каталог услуг и мастера, bcrypt. Возвращает тайминги шагов."""
+    timings = {}
+
+    t0 = time.perf_counter()
+    warmed = await asyncio.gather(*(warm_pool(engine, connections) for engine in engines))
+    timings["pool"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    try:
+        await service_catalog.load()
+        await master_roster.ids()
+    except Exception as error:
+        logger.warning("Service catalog warm-up failed: %r", error)
+    timings["catalog"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    await warm_up_hashing()
+    timings["bcrypt"] = time.perf_counter() - t0
+
+    logger.info(
+        "Warm-up: %s connections, pool %.0f ms, catalog %.0f ms, bcrypt %.0f ms",
+        "+".join(map(str, warmed)), timings["pool"] * 1000, timings["catalog"] * 1000, timings["bcrypt"] * 1000,
+    )
+    return timings
@@ -0,0 +1,129 @@
+"""
+Дневная сводка записей (daily_stats): количество, занятые минуты и выручка по дню, услуге и статусу.
+
+Хендлеры записи и отмены обновляют её в той же транзакции (record_stats). Полный пересчёт
+из appointments — если сводка разошлась или после ручных правок в базе:
+    python -m app.db.daily_stats                                   # всё, что ещё в appointments
+    python -m app.db.daily_stats --from 2026-01-01 --to 2026-01-31 # только период
+"""
+import argparse
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.partitions import add_months, month_start
+from app.db.session import AsyncSessionLocal, engine
+from app.models.daily_stat import DailyStat
+
+# (день, service_id, статус) -> [записей, минут, выручка]
+StatsDelta = dict[tuple[date, int, str], list[int]]
+
+
+def new_delta() -> StatsDelta:
+    return defaultdict(lambda: [0, 0, 0])
+
+
+def add_booking(
+    delta: StatsDelta, time_start: datetime, time_end: datetime, service_id: int, status: str, price: int,
+    sign: int = 1,
+) -> None:
+    """Учесть визит (sign=-1 — убрать, например, старый статус при смене статуса)."""
+    totals = delta[(time_start.date(), service_id, status)]
+    totals[0] += sign
+    totals[1] += sign * int((time_end - time_start).total_seconds() // 60)
+    totals[2] += sign * price
+
+
+async def record_stats(db: AsyncSession, delta: StatsDelta) -> None:
+    """Одна многострочная вставка с прибавлением к существующим строкам (в транзакции хендлера)."""
+    if not delta:
+        return
+    stmt = insert(DailyStat).values([
+        {
+            "day": day, "service_id": service_id, "status": status,
+            "bookings": bookings, "booked_minutes": minutes, "revenue": revenue,
+        }
+        for (day, service_id, status), (bookings, minutes, revenue) in sorted(delta.items())
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[DailyStat.day, DailyStat.service_id, DailyStat.status],
+        set_={
+            "bookings": DailyStat.bookings + stmt.excluded.bookings,
+            "booked_minutes": DailyStat.booked_minutes + stmt.excluded.booked_minutes,
+            "revenue": DailyStat.revenue + stmt.excluded.revenue,
+        },
+    )
+    await db.execute(stmt)
+
+
+REBUILD_SQL = """
+    INSERT INTO daily_stats (day, service_id, status, bookings, booked_minutes, revenue)
+    SELECT
+        a.time_start::date,
+        a.service_id,
+        a.status,
+        count(*),
+        sum(extract(epoch FROM a.time_end - a.time_start)::int / 60),
+        sum(a.price)
+    FROM appointments AS a
+    WHERE a.time_start >= :range_start AND a.time_start < :range_end
+    GROUP BY 1, 2, 3
+"""
+
+
+async def attached_since(db: AsyncSession, today: date | None = None) -> date:
+    """
+    С какого дня визиты ещё лежат в appointments: с начала срока хранения
+    или раньше, если старые месяцы ещё не отсоединены (app/db/partitions.py).
+    """
+    oldest_kept = add_months(month_start(today or date.today()), -settings.APPOINTMENT_RETENTION_MONTHS)
+    first_start = await db.scalar(text("SELECT min(time_start) FROM appointments"))
+    return min(oldest_kept, first_start.date()) if first_start else oldest_kept
+
+
+async def rebuild(date_from: date | None = None, date_to: date | None = None) -> int:
+    """
+    Пересчитать сводку за период (по умолчанию — всю, что ещё в appointments) из appointments.
+    Дни отсоединённых и архивных партиций не трогаем, даже если они попали в период:
+    визитов за них в appointments уже нет, а сводка должна их пережить.
+    Таблица блокируется от записи на время пересчёта: параллельные записи и отмены
+    подождут и прибавятся уже к новым строкам, ничего не потеряется и не задвоится.
+    """
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("LOCK TABLE daily_stats IN SHARE ROW EXCLUSIVE MODE"))
+        since = await attached_since(db)
+        range_start = datetime.combine(max(date_from or since, since), datetime.min.time())
+        range_end = datetime.combine(date_to or date.max - timedelta(days=1), datetime.min.time()) + timedelta(days=1)
+        if range_end <= range_start:
+            return 0
+        params = {"range_start": range_start, "range_end": range_end}
+        await db.execute(
+            text("DELETE FROM daily_stats WHERE day >= :range_start AND day < :range_end"), params
+        )
+        result = await db.execute(text(REBUILD_SQL), params)
+        await db.commit()
+    return result.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="date_from", type=date.fromisoformat, default=None)
+    parser.add_argument("--to", dest="date_to", type=date.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    async def run() -> int:
+        try:
+            return await rebuild(args.date_from, args.date_to)
+        finally:
+            await engine.dispose()
+
+    print(f"daily_stats rows: {asyncio.run(run())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+from datetime import date
+from typing import Callable
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Канал Postgres, в который пишем дату, где поменялись записи
+APPOINTMENTS_CHANNEL = "appointments_changed"
+# Канал отзыва токенов: "user_id:token_version" — токены ниже этой версии больше не действуют
+TOKENS_CHANNEL = "tokens_revoked"
+
+DayCallback = Callable[[date | None], None]
+TokensCallback = Callable[[int | None, int], None]
+
+
+async def notify_day_changed(db: AsyncSession, day: date) -> None:
+    """
+    NOTIFY в текущей транзакции: Postgres разошлёт его всем воркерам только после COMMIT,
+    а при откате не разошлёт вовсе.
+    """
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": APPOINTMENTS_CHANNEL, "payload": day.isoformat()},
+    )
+
+
+async def notify_tokens_revoked(db: AsyncSession, user_id: int, token_version: int) -> None:
+    """NOTIFY об отзыве токенов пользователя; как и notify_day_changed — только после COMMIT."""
+    await db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": TOKENS_CHANNEL, "payload": f"{user_id}:{token_version}"},
+    )
+
+
+def _asyncpg_dsn(url: str) -> str:
+    """postgresql+asyncpg://... -> postgresql://... для asyncpg.connect."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class DayChangeListener:
+    """
+    Отдельное соединение asyncpg на воркер, которое слушает APPOINTMENTS_CHANNEL
+    и вызывает подписчиков с изменившейся датой; на том же соединении — TOKENS_CHANNEL
+    для подписчиков subscribe_tokens.
+    Если соединение рвётся — переподключается и вызывает подписчиков с None
+    (пока нас не было, уведомления могли потеряться).
+    """
+
+    def __init__(self, url: str, channel: str = APPOINTMENTS_CHANNEL, reconnect_delay: float = 5.0):
+        self.dsn = _asyncpg_dsn(url)
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._callbacks: list[DayCallback] = []
+        self._token_callbacks: list[TokensCallback] = []
+        self._task: asyncio.Task | None = None
+        self._conn: asyncpg.Connection | None = None
+
+    def subscribe(self, callback: DayCallback) -> None:
+        """Повторная подписка того же колбэка (ещё один lifespan, create_app) ничего не делает."""
+        if callback not in self._callbacks:
+            self._callbacks.append(callback)
+
+    def subscribe_tokens(self, callback: TokensCallback) -> None:
+        if callback not in self._token_callbacks:
+            self._token_callbacks.append(callback)
+
+    def _dispatch(self, day: date | None) -> None:
+        for callback in self._callbacks:
+            try:
+                callback(day)
+            except Exception:
+                logger.exception("Day change callback failed")
+
+    def _dispatch_tokens(self, user_id: int | None, token_version: int = 0) -> None:
+        for callback in self._token_callbacks:
+            try:
+                callback(user_id, token_version)
+            except Exception:
+                logger.exception("Token revocation callback failed")
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            day = date.fromisoformat(payload)
+        except ValueError:
+            logger.warning("Bad %s payload: %r", channel, payload)
+            return
+        self._dispatch(day)
+
+    def _on_tokens_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            user_id, token_version = map(int, payload.split(":"))
+        except ValueError:
+            logger.warning("Bad %s payload: %r", channel, payload)
+            return
+        self._dispatch_tokens(user_id, token_version)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                self._conn = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                self._conn.add_termination_listener(lambda connection: lost.set())
+                await self._conn.add_listener(self.channel, self._on_notify)
+                await self._conn.add_listener(TOKENS_CHANNEL, self._on_tokens_notify)
+                self._dispatch(None)
+                self._dispatch_tokens(None)
+                await lost.wait()
+                logger.warning("LISTEN %s connection lost, reconnecting", self.channel)
+            except Exception:
+                # Любая ошибка (сеть, InterfaceError при add_listener, кривой DSN) — только повод
+                # переподключиться: без слушателя воркер больше не сбросит кэш слотов и ленту SSE.
+                # CancelledError (stop) сюда не попадает — это BaseException
+                logger.exception("LISTEN %s failed, reconnecting", self.channel)
+            await self._close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _close(self) -> None:
+        if self._conn is not None and not self._conn.is_closed():
+            try:
+                await self._conn.close(timeout=self.reconnect_delay)
+            except Exception:
+                self._conn.terminate()
+        self._conn = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close()
+
+
+day_change_listener = DayChangeListener(settings.DATABASE_URL)
@@ -0,0 +1,184 @@
+"""
+Обслуживание месячных партиций appointments (партиционирована по time_start).
+
+Запуск из корня проекта (например, раз в сутки по cron):
+    python -m app.db.partitions                # создать будущие, архивировать старые
+    python -m app.db.partitions --drop         # старые не архивировать, а удалять
+    python -m app.db.partitions --dry-run      # только показать, что будет сделано
+
+Партиция месяца — appointments_pYYYYMM, всё вне созданных месяцев попадает в appointments_default.
+Ограничение на накладки (ex_<партиция>_no_overlap) живёт на каждой партиции: на партиционированной
+таблице Postgres его не поддерживает, а визит целиком лежит внутри одного месяца.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+PARENT = "appointments"
+DEFAULT_PARTITION = "appointments_default"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def no_overlap_ddl(table: str) -> str:
+    """
+    Ограничение на накладки для одной партиции. Мастер — диапазон [id, id]; запись без мастера —
+    int4range(NULL, NULL), неограниченный диапазон, т.е. она занимает сразу всех мастеров.
+    """
+    return f"""
+        ALTER TABLE {table}
+        ADD CONSTRAINT ex_{table}_no_overlap
+        EXCLUDE USING gist (
+            int4range(master_id, master_id, '[]') WITH &&,
+            tsrange(time_start, time_end) WITH &&
+        )
+        WHERE (status != 'cancelled')
+    """
+
+
+async def existing_partitions(conn: AsyncConnection) -> set[str]:
+    result = await conn.execute(
+        text(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :parent
+            """
+        ),
+        {"parent": PARENT},
+    )
+    return set(result.scalars())
+
+
+async def create_month(conn: AsyncConnection, month: date) -> None:
+    """
+    Партиция на месяц. Записи этого месяца, уже попавшие в default, переносятся в неё
+    до ATTACH — иначе Postgres не даст прикрепить партицию. Всё — в одной транзакции вызывающего.
+    """
+    name = partition_name(month)
+    lower, upper = month, add_months(month, 1)
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    await conn.execute(text(no_overlap_ddl(name)))
+    # До COMMIT новые записи в default не попадут: иначе запись на этот месяц, вставленная между
+    # переносом и ATTACH, сорвала бы ATTACH (или привела к взаимной блокировке)
+    await conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+    await conn.execute(
+        text(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE time_start >= :lower AND time_start < :upper
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """
+        ),
+        {"lower": lower, "upper": upper},
+    )
+    await conn.execute(
+        text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')")
+    )
+
+
+async def retire_month(conn: AsyncConnection, month: date, drop: bool, archive_schema: str) -> None:
+    """Отсоединить партицию месяца и перенести её в архивную схему (или удалить)."""
+    name = partition_name(month)
+    await conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+    if drop:
+        await conn.execute(text(f"DROP TABLE {name}"))
+    else:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+        await conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {archive_schema}"))
+
+
+async def maintain(
+    today: date | None = None,
+    ahead_months: int = settings.APPOINTMENT_PARTITIONS_AHEAD_MONTHS,
+    retention_months: int = settings.APPOINTMENT_RETENTION_MONTHS,
+    drop: bool = False,
+    archive_schema: str = settings.APPOINTMENT_ARCHIVE_SCHEMA,
+    dry_run: bool = False,
+) -> list[str]:
+    """
+    Создаёт партиции с текущего месяца на ahead_months вперёд и убирает месяцы,
+    которые целиком старше retention_months. Каждый шаг — отдельная транзакция.
+    """
+    current = month_start(today or date.today())
+    oldest_kept = add_months(current, -retention_months)
+    actions = []
+
+    async with engine.connect() as conn:
+        partitions = await existing_partitions(conn)
+
+    for offset in range(ahead_months + 1):
+        month = add_months(current, offset)
+        if partition_name(month) not in partitions:
+            actions.append(("create", month))
+
+    for name in sorted(partitions):
+        if name == DEFAULT_PARTITION:
+            continue
+        month = date(int(name[-6:-2]), int(name[-2:]), 1)
+        if month < oldest_kept:
+            actions.append(("drop" if drop else "archive", month))
+
+    done = []
+    for action, month in actions:
+        done.append(f"{action} {partition_name(month)}")
+        logger.info("Partition maintenance: %s", done[-1])
+        if dry_run:
+            continue
+        async with engine.begin() as conn:
+            if action == "create":
+                await create_month(conn, month)
+            else:
+                await retire_month(conn, month, drop, archive_schema)
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ahead", type=int, default=settings.APPOINTMENT_PARTITIONS_AHEAD_MONTHS, help="месяцев вперёд")
+    parser.add_argument("--retention", type=int, default=settings.APPOINTMENT_RETENTION_MONTHS, help="месяцев хранить")
+    parser.add_argument("--drop", action="store_true", help="удалять старые партиции вместо архивации")
+    parser.add_argument("--archive-schema", default=settings.APPOINTMENT_ARCHIVE_SCHEMA)
+    parser.add_argument("--today", type=date.fromisoformat, default=None, help="считать от этой даты (YYYY-MM-DD)")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    async def run() -> list[str]:
+        try:
+            return await maintain(
+                args.today, args.ahead, args.retention, args.drop, args.archive_schema, args.dry_run
+            )
+        finally:
+            await engine.dispose()
+
+    for line in asyncio.run(run()) or ["nothing to do"]:
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
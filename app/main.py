@@ -1,32 +1,158 @@
-from fastapi import FastAPI
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware  # <--- Импорт
 from app.api.users import router as users_router
 from app.api.auth import router as auth_router
 from app.api.services import router as services_router
-from app.api.appointments import router as appointments_router
-
-app = FastAPI(title="Barbershop API")
-
-# 👇 НАСТРОЙКА CORS (РАЗРЕШЕНИЕ ДЛЯ ФРОНТЕНДА)
-origins = [
-    "http://localhost:3000",  # React / Next.js
-    "http://127.0.0.1:3000",
-    "http://localhost:5173",  # Vite
-]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Пока разрешаем ВСЕМ (для удобства разработки)
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(auth_router, prefix="/auth", tags=["Auth"])
-app.include_router(users_router, prefix="/users", tags=["Users"])
-app.include_router(services_router, prefix="/services", tags=["Services"])
-app.include_router(appointments_router, prefix="/appointments", tags=["Appointments"])
-
-@app.get("/")
+from app.api.appointments import router as appointments_router, slot_feed
+from app.api.analytics import router as analytics_router
+from app.api.deps import revoke_tokens
+from app.core.idempotency import REPLAYED_HEADER
+from app.core import logs, metrics
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.core.slot_cache import slot_cache
+from app.core.warmup import warm_up
+from app.db.notify import day_change_listener
+from app.db.session import engine, read_engine, pool_stats
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+
+def _engines() -> list:
+    return [engine] if read_engine is engine else [engine, read_engine]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    t0 = time.perf_counter()
+    # Логи — через очередь и отдельный поток, чтобы запись в stdout не блокировала event loop
+    logs.setup_logging()
+    # Слушаем изменения записей от всех воркеров и сбрасываем кэш слотов нужного дня
+    day_change_listener.subscribe(slot_cache.evict_day)
+    # ...и рассылаем разницу слотов подписчикам SSE
+    day_change_listener.subscribe(slot_feed.day_changed)
+    # ...и отзыв токенов: заблокированный пользователь теряет доступ во всех воркерах
+    day_change_listener.subscribe_tokens(revoke_tokens)
+    day_change_listener.start()
+    # Первые запросы после деплоя не должны открывать соединения и греть bcrypt
+    if settings.STARTUP_WARMUP:
+        await warm_up(_engines(), settings.DB_WARMUP_CONNECTIONS)
+    metrics.startup_seconds = time.perf_counter() - t0
+    logger.info("Startup finished in %.0f ms", metrics.startup_seconds * 1000)
+    yield
+    await day_change_listener.stop()
+    for db_engine in _engines():
+        await db_engine.dispose()
+    logs.stop_logging()
+
+
+def _all_pool_stats() -> dict:
+    stats = {"primary": pool_stats(engine)}
+    if read_engine is not engine:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
+
+
+def _request_id(request: Request) -> str:
+    """X-Request-ID от прокси или клиента, если он разумный, иначе новый."""
+    incoming = request.headers.get(REQUEST_ID_HEADER)
+    if incoming and len(incoming) <= 64 and incoming.isprintable():
+        return incoming
+    return uuid.uuid4().hex
+
+
+async def metrics_middleware(request: Request, call_next):
+    """
+    Время ответа по хендлерам, число SQL на запрос, Server-Timing, access-лог и лог медленных запросов.
+    Все строки лога запроса (и его SQL) помечены одним request_id — он же уходит в X-Request-ID.
+    """
+    stats = metrics.RequestStats()
+    request_id = _request_id(request)
+    tokens = (
+        metrics.current_request_stats.set(stats),
+        logs.request_id.set(request_id),
+        logs.request_route.set(f"{request.method} {request.url.path}"),
+    )
+    t0 = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.current_request_stats.reset(tokens[0])
+    elapsed = time.perf_counter() - t0
+
+    # Метка — имя хендлера, а не сырой путь: иначе метрик станет бесконечно много
+    endpoint = request.scope.get("endpoint")
+    handler = endpoint.__name__ if endpoint is not None else "unmatched"
+    metrics.observe_request(request.method, handler, response.status_code, elapsed, stats)
+    metrics.log_if_slow(request.method, request.url.path, elapsed, stats, settings.SLOW_REQUEST_MS)
+    logs.log_access(request.method, request.url.path, response.status_code, elapsed, stats.queries)
+    logs.request_route.reset(tokens[2])
+    logs.request_id.reset(tokens[1])
+    response.headers["Server-Timing"] = metrics.server_timing(elapsed, stats)
+    response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
+
 async def root():
-    return {"message": "Welcome to Barbershop API"}
\ No newline at end of file
+    return {"message": "Welcome to Barbershop API"}
+
+
+async def database_pool_stats():
+    """Состояние пула соединений с базой (для мониторинга)."""
+    return _all_pool_stats()
+
+
+async def prometheus_metrics():
+    """Метрики этого воркера в формате Prometheus."""
+    return PlainTextResponse(
+        metrics.render_prometheus(_all_pool_stats()),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+def create_app() -> FastAPI:
+    """
+    Сборка приложения. uvicorn app.main:app — готовый экземпляр,
+    uvicorn --factory app.main:create_app — новый на каждый запуск.
+    """
+    # orjson по умолчанию для всех ответов (быстрее стандартного json.dumps)
+    app = FastAPI(title="Barbershop API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+    # Считаем SQL-запросы обоих движков
+    for db_engine in _engines():
+        metrics.install_sql_hooks(db_engine)
+
+    app.middleware("http")(metrics_middleware)
+
+    # 👇 НАСТРОЙКА CORS (РАЗРЕШЕНИЕ ДЛЯ ФРОНТЕНДА)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # Пока разрешаем ВСЕМ (для удобства разработки)
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Чтобы фронтенд видел кэш, пагинацию, тайминги, повторы по Idempotency-Key и id запроса для поддержки
+        expose_headers=["ETag", "X-Next-Cursor", "Server-Timing", REPLAYED_HEADER, REQUEST_ID_HEADER],
+    )
+
+    app.include_router(auth_router, prefix="/auth", tags=["Auth"])
+    app.include_router(users_router, prefix="/users", tags=["Users"])
+    app.include_router(services_router, prefix="/services", tags=["Services"])
+    app.include_router(appointments_router, prefix="/appointments", tags=["Appointments"])
+    app.include_router(analytics_router, prefix="/analytics", tags=["Analytics"])
+
+    app.get("/")(root)
+    app.get("/health/pool")(database_pool_stats)
+    app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)(prometheus_metrics)
+    return app
+
+
+app = create_app()
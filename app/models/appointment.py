@@ -1,16 +1,35 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey, DateTime, String
+from sqlalchemy import ForeignKey, DateTime, Integer, String, Index
 from datetime import datetime
 from app.db.session import Base
 
 class Appointment(Base):  # <--- Проверь, что тут написано (Base)
     __tablename__ = "appointments"
+    __table_args__ = (
+        # Дневные выборки: диапазон по time_start + фильтр по статусу
+        Index("ix_appointments_time_start_status", "time_start", "status"),
+        # Keyset-пагинация админки: ORDER BY time_start, id
+        Index("ix_appointments_time_start_id", "time_start", "id"),
+        # День одного мастера: слоты и проверка накладок по одному креслу
+        Index("ix_appointments_master_id_time_start", "master_id", "time_start"),
+        # Месячные партиции по time_start (создаёт и архивирует python -m app.db.partitions).
+        # Запрет пересекающихся визитов к одному мастеру (ex_<партиция>_no_overlap) висит на каждой
+        # партиции: на партиционированной таблице такое ограничение Postgres не поддерживает.
+        # Визит без мастера (master_id = NULL) пересекается с визитами всех мастеров
+        {"postgresql_partition_by": "RANGE (time_start)"},
+    )
+    # Ключ в базе — (id, time_start) (ключ партиции обязан в него входить), но id уникален сам по себе
+    __mapper_args__ = {"primary_key": ["id"]}
 
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+    id: Mapped[int] = mapped_column(primary_key=True, index=True, autoincrement=True)
     client_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     service_id: Mapped[int] = mapped_column(ForeignKey("services.id"))
-    time_start: Mapped[datetime] = mapped_column(DateTime)
+    master_id: Mapped[int | None] = mapped_column(ForeignKey("users.id"), nullable=True)
+    time_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    time_end: Mapped[datetime] = mapped_column(DateTime)  # time_start + длительность услуги
     status: Mapped[str] = mapped_column(String, default="pending")
+    price: Mapped[int] = mapped_column(Integer)  # Цена услуги на момент записи (для выручки)
 
-    client = relationship("User")
-    service = relationship("Service", lazy="selectin")
\ No newline at end of file
+    client = relationship("User", foreign_keys=[client_id])
+    master = relationship("User", foreign_keys=[master_id])
+    service = relationship("Service", lazy="selectin")
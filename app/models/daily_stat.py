@@ -0,0 +1,16 @@
+from datetime import date
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Date, ForeignKey, Integer, String
+from app.db.session import Base
+
+class DailyStat(Base):
+    """Сводка записей за день по услуге и статусу (обновляется вместе с записями)."""
+    __tablename__ = "daily_stats"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    service_id: Mapped[int] = mapped_column(ForeignKey("services.id"), primary_key=True)
+    status: Mapped[str] = mapped_column(String, primary_key=True)
+    bookings: Mapped[int] = mapped_column(Integer, default=0)
+    booked_minutes: Mapped[int] = mapped_column(Integer, default=0)
+    revenue: Mapped[int] = mapped_column(Integer, default=0)  # По цене услуги на момент записи
@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Integer, DateTime
+from app.db.session import Base
+
+class IdempotencyKey(Base):
+    """Успешный ответ на POST с заголовком Idempotency-Key: повтор получает его без повторной работы."""
+    __tablename__ = "idempotency_keys"
+
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)  # "appointments:42", "users"
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64))  # HMAC тела запроса: тот же ключ — то же тело
+    status_code: Mapped[int] = mapped_column(Integer)
+    response: Mapped[dict] = mapped_column(JSON)  # json, а не jsonb: повтор отдаётся байт в байт
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, Float, DateTime
+from app.db.session import Base
+
+class RateLimitBucket(Base):
+    """Общие для всех воркеров token bucket'ы (LOGIN_RATE_LIMIT_BACKEND=postgres)."""
+    __tablename__ = "rate_limit_buckets"
+    # UNLOGGED: без WAL — после падения базы счётчики просто обнулятся
+    __table_args__ = {"prefixes": ["UNLOGGED"]}
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)  # "login:ip:1.2.3.4"
+    tokens: Mapped[float] = mapped_column(Float)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), index=True)
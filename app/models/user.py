@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String, Boolean
+from sqlalchemy import String, Boolean, Integer
 from app.db.session import Base
 import enum
 
@@ -17,4 +17,6 @@ class User(Base):
     full_name: Mapped[str] = mapped_column(String, nullable=True)
     phone: Mapped[str] = mapped_column(String, nullable=True)
     role: Mapped[str] = mapped_column(String, default=UserRole.CLIENT.value)
-    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
\ No newline at end of file
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Увеличиваем, чтобы отозвать все выданные токены пользователя
+    token_version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
\ No newline at end of file
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+# Одна строка отчёта: день, месяц или услуга
+class AnalyticsRow(BaseModel):
+    key: str  # 2026-03-07 / 2026-03 / id услуги
+    bookings: int  # Без отменённых
+    booked_minutes: int
+    revenue: int
+    cancelled: int
+    utilization: float | None = None  # Доля занятого времени мастеров (для day и month)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field, TypeAdapter
+from datetime import date, datetime
+from typing import Literal
 
 # Базовая схема
 class AppointmentBase(BaseModel):
@@ -8,13 +9,48 @@ class AppointmentBase(BaseModel):
 
 # То, что присылает клиент при записи
 class AppointmentCreate(AppointmentBase):
-    pass
+    master_id: int | None = None  # Не указан — к любому свободному мастеру
 
 # То, что мы отдаем в ответ (с ID и статусом)
 class AppointmentResponse(AppointmentBase):
     id: int
     client_id: int
+    master_id: int | None = None
     status: str # pending / confirmed
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Для админки: запись + контакты клиента
+class AppointmentAdminResponse(AppointmentResponse):
+    client_name: str | None = None
+    client_phone: str | None = None
+
+# Повторяющаяся запись: start, потом каждые interval_days дней — count раз или до until
+class AppointmentRecurrence(BaseModel):
+    start: datetime
+    interval_days: int = Field(7, ge=1)  # По умолчанию — раз в неделю
+    count: int | None = Field(None, ge=1)
+    until: date | None = None
+
+# Пакетная запись: список времён или правило повторения (что-то одно)
+class AppointmentBatchCreate(BaseModel):
+    service_id: int
+    master_id: int | None = None
+    times: list[datetime] | None = None
+    recurrence: AppointmentRecurrence | None = None
+
+# Результат по каждому времени пакета
+class AppointmentBatchItem(BaseModel):
+    time_start: datetime
+    status: Literal["created", "conflict", "closed"]
+    id: int | None = None
+    master_id: int | None = None
+
+class AppointmentBatchResponse(BaseModel):
+    created: int
+    items: list[AppointmentBatchItem]
+
+# Готовые валидаторы/сериализаторы списков (собираются один раз при импорте)
+AppointmentListAdapter = TypeAdapter(list[AppointmentResponse])
+AppointmentAdminListAdapter = TypeAdapter(list[AppointmentAdminResponse])
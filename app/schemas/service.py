@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 # Базовый класс (общие поля)
 class ServiceBase(BaseModel):
@@ -16,4 +16,7 @@ class ServiceResponse(ServiceBase):
     id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Готовый валидатор/сериализатор списка услуг
+ServiceListAdapter = TypeAdapter(list[ServiceResponse])
@@ -4,5 +4,9 @@ class Token(BaseModel):
     access_token: str
     token_type: str
 
+# Что лежит внутри JWT: по этим данным проверяем доступ без похода в базу
 class TokenData(BaseModel):
-    email: str | None = None
\ No newline at end of file
+    email: str | None = None
+    user_id: int
+    role: str
+    token_version: int = 0
@@ -17,4 +17,9 @@ class UserResponse(UserBase):
     is_active: bool
 
     class Config:
-        from_attributes = True # Важно для работы с ORM
\ No newline at end of file
+        from_attributes = True # Важно для работы с ORM
+
+# Мастер для выбора при записи (без контактов)
+class MasterResponse(BaseModel):
+    id: int
+    full_name: str | None = None
@@ -0,0 +1,110 @@
+"""
+Сколько стоит строка лога для event loop: запись в stdout прямо из корутины против очереди.
+
+Запуск из корня проекта (сервер и база не нужны):
+    python -m benchmarks.bench_logging --records 20000 --output /tmp/bench.log
+
+Каждая корутина пишет строки, похожие на лог SQL (JSON, с request_id), и меряет, сколько
+занял сам вызов logger.info. sync — StreamHandler в файле вызывается в event loop (так работал echo),
+queue — QueueHandler из app.core.logs: в loop только постановка в очередь, запись делает поток.
+--sink-delay-us имитирует медленный stdout (pipe в сборщик логов, терминал): каждая запись
+ждёт столько микросекунд. На быстром локальном файле (--sink-delay-us 0) очередь почти не выигрывает —
+её смысл в том, что ожидание stdout уходит из event loop. С --sample 0.1 видно, сколько экономит выборка.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import time
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+
+from app.core.logs import JsonFormatter, RequestContextFilter, request_id, sampled
+from benchmarks.report import percentile
+
+STATEMENT = (
+    "SELECT appointments.master_id, appointments.time_start, appointments.time_end FROM appointments "
+    "WHERE appointments.time_start >= $1::TIMESTAMP AND appointments.time_start < $2::TIMESTAMP"
+)
+
+
+class SlowStream:
+    """Файл, запись в который ждёт delay секунд — как заполненный pipe."""
+
+    def __init__(self, output, delay: float):
+        self.output = output
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        return self.output.write(text)
+
+    def flush(self) -> None:
+        self.output.flush()
+
+
+async def writer(logger: logging.Logger, records: int, rate: float, latencies: list[float], n: int) -> None:
+    request_id.set(f"bench-{n}")
+    for i in range(records):
+        t0 = time.perf_counter()
+        if sampled(rate):
+            logger.info("SQL %.1f ms: %s", 0.8, STATEMENT, extra={"duration_ms": 0.8})
+        latencies.append((time.perf_counter() - t0) * 1_000_000)
+        if i % 100 == 0:
+            await asyncio.sleep(0)
+
+
+async def run(handler: logging.Handler, args) -> list[float]:
+    logger = logging.getLogger(f"bench.{id(handler)}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    latencies: list[float] = []
+    await asyncio.gather(*(
+        writer(logger, args.records // args.tasks, args.sample, latencies, n) for n in range(args.tasks)
+    ))
+    logger.removeHandler(handler)
+    return latencies
+
+
+def report(title: str, latencies: list[float], seconds: float) -> None:
+    print(
+        f"{title:<6} calls={len(latencies):<7} "
+        f"p50={statistics.median(latencies):7.1f} us  "
+        f"p99={percentile(latencies, 99):7.1f} us  "
+        f"loop time={seconds * 1000:8.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--tasks", type=int, default=20, help="параллельных корутин")
+    parser.add_argument("--sample", type=float, default=1.0, help="доля записываемых строк")
+    parser.add_argument("--output", default=os.devnull, help="файл, куда пишет лог")
+    parser.add_argument("--sink-delay-us", type=float, default=50, help="задержка каждой записи в файл")
+    args = parser.parse_args()
+
+    with open(args.output, "w") as output:
+        stream = logging.StreamHandler(SlowStream(output, args.sink_delay_us / 1_000_000))
+        stream.setFormatter(JsonFormatter())
+        stream.addFilter(RequestContextFilter())
+        t0 = time.perf_counter()
+        latencies = asyncio.run(run(stream, args))
+        report("sync", latencies, time.perf_counter() - t0)
+
+        log_queue: SimpleQueue = SimpleQueue()
+        queued = QueueHandler(log_queue)
+        queued.addFilter(RequestContextFilter())
+        listener = QueueListener(log_queue, stream)
+        listener.start()
+        t0 = time.perf_counter()
+        latencies = asyncio.run(run(queued, args))
+        report("queue", latencies, time.perf_counter() - t0)
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
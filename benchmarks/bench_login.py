@@ -0,0 +1,102 @@
+"""
+Задержка GET /services/ во время волны логинов.
+
+Нужен запущенный сервер (uvicorn app.main:app). Запуск из корня проекта:
+    python -m benchmarks.bench_login --url http://localhost:8000 --logins 20 --duration 10
+
+Сначала меряется фон (только /services/), потом то же самое, пока
+--logins клиентов без остановки ходят в /auth/token. Если bcrypt блокирует
+event loop, p99 во втором прогоне вырастет на сотни миллисекунд.
+
+Все логины идут с одного IP, поэтому большая часть получит 429 (лимит по IP и аккаунту)
+или 503 (LOGIN_MAX_IN_FLIGHT) — это и есть защита; такой клиент ждёт Retry-After
+(не дольше --max-backoff), а число отказов печатается в rejected. Чтобы мерить сам bcrypt без лимитов,
+запустите сервер с большими LOGIN_IP_BURST и LOGIN_ACCOUNT_BURST.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from benchmarks.report import percentile
+
+
+async def poll_services(client: httpx.AsyncClient, deadline: float, latencies: list[float]) -> None:
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        response = await client.get("/services/")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - t0) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def login_loop(
+    client: httpx.AsyncClient, deadline: float, email: str, password: str, max_backoff: float
+) -> tuple[int, int]:
+    """
+    (прошло логинов, отклонено лимитами). На 429/503 ждём Retry-After (не больше max_backoff),
+    как вёл бы себя нормальный клиент: иначе мерили бы шквал отказов, а не влияние bcrypt.
+    """
+    count = rejected = 0
+    while time.perf_counter() < deadline:
+        response = await client.post("/auth/token", data={"username": email, "password": password})
+        if response.status_code in (429, 503):
+            rejected += 1
+            try:
+                retry_after = float(response.headers.get("Retry-After", max_backoff))
+            except ValueError:
+                retry_after = max_backoff
+            await asyncio.sleep(max(0.0, min(retry_after, max_backoff, deadline - time.perf_counter())))
+            continue
+        response.raise_for_status()
+        count += 1
+    return count, rejected
+
+
+async def run(args, logins: int) -> tuple[list[float], int, int]:
+    latencies: list[float] = []
+    limits = httpx.Limits(max_connections=logins + 10)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + args.duration
+        results = await asyncio.gather(
+            poll_services(client, deadline, latencies),
+            *(login_loop(client, deadline, args.email, args.password, args.max_backoff) for _ in range(logins)),
+        )
+    return latencies, sum(ok for ok, _ in results[1:]), sum(rejected for _, rejected in results[1:])
+
+
+def report(title: str, latencies: list[float], logins: int, rejected: int, duration: float) -> None:
+    print(
+        f"{title:<12} n={len(latencies):<5} "
+        f"p50={statistics.median(latencies):7.1f} ms  "
+        f"p99={percentile(latencies, 99):7.1f} ms  "
+        f"max={max(latencies):7.1f} ms  "
+        f"logins/s={logins / duration:6.1f}  "
+        f"rejected={rejected}"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--logins", type=int, default=20, help="параллельных клиентов, которые логинятся")
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на каждый прогон")
+    parser.add_argument("--max-backoff", type=float, default=1.0, help="максимум секунд ожидания после 429/503")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.url) as client:
+        # Пользователь для логинов; 400 — значит уже создан
+        await client.post("/users/", json={"email": args.email, "password": args.password})
+
+    latencies, _, _ = await run(args, logins=0)
+    report("baseline", latencies, 0, 0, args.duration)
+    latencies, logins, rejected = await run(args, logins=args.logins)
+    report("with logins", latencies, logins, rejected, args.duration)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
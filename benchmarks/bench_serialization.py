@@ -0,0 +1,99 @@
+"""
+Сколько стоит сериализация списка из 10k AppointmentResponse разными способами.
+
+Запуск из корня проекта (база не нужна):
+    python -m benchmarks.bench_serialization --rows 10000 --repeat 20
+
+Сравниваются:
+  * jsonable_encoder + json.dumps — путь ответа без response_model со стандартным JSONResponse;
+  * validate + json.dumps — response_model и стандартный JSONResponse (повторная валидация);
+  * validate + orjson — response_model и FastJSONResponse;
+  * validate + dump_json — готовый TypeAdapter, сразу в байты (ядро pydantic);
+  * trusted orjson — trusted_response: словари из выборки колонок без валидации.
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+from app.schemas.appointment import AppointmentListAdapter
+
+
+def make_rows(count: int) -> list[dict]:
+    start = datetime(2031, 1, 1, 10, 0)
+    return [
+        {
+            "id": i,
+            "service_id": i % 12 + 1,
+            "master_id": i % 5 + 1 if i % 7 else None,
+            "time_start": start + timedelta(minutes=30 * i),
+            "client_id": i % 1000 + 1,
+            "status": "confirmed",
+        }
+        for i in range(count)
+    ]
+
+
+def classic_encoder(rows):
+    return json.dumps(jsonable_encoder(rows)).encode()
+
+
+def validate_json(rows):
+    items = AppointmentListAdapter.validate_python(rows)
+    return json.dumps(AppointmentListAdapter.dump_python(items, mode="json")).encode()
+
+
+def validate_orjson(rows):
+    items = AppointmentListAdapter.validate_python(rows)
+    return orjson.dumps(AppointmentListAdapter.dump_python(items, mode="json"))
+
+
+def validate_dump_json(rows):
+    return AppointmentListAdapter.dump_json(AppointmentListAdapter.validate_python(rows))
+
+
+def trusted_orjson(rows):
+    return orjson.dumps(rows, option=orjson.OPT_NON_STR_KEYS)
+
+
+VARIANTS = {
+    "jsonable_encoder + json": classic_encoder,
+    "validate + json": validate_json,
+    "validate + orjson": validate_orjson,
+    "validate + dump_json": validate_dump_json,
+    "trusted orjson": trusted_orjson,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    # Все варианты должны отдавать одинаковый JSON
+    reference = json.loads(classic_encoder(rows))
+    for name, serialize in VARIANTS.items():
+        if json.loads(serialize(rows)) != reference:
+            raise SystemExit(f"{name}: JSON отличается от jsonable_encoder")
+
+    baseline = None
+    print(f"{'variant':<26} {'median ms':>10} {'min ms':>8} {'speedup':>8}")
+    for name, serialize in VARIANTS.items():
+        timings = []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            serialize(rows)
+            timings.append((time.perf_counter() - t0) * 1000)
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(f"{name:<26} {median:>10.2f} {min(timings):>8.2f} {baseline / median:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Сравнение движка слотов (app/core/slots.py) со старым вложенным циклом.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_slots [--days 2000] [--appointments 40]
+
+Сначала на случайных днях проверяется, что оба варианта дают одинаковые слоты
+и одинаковый ответ на проверку пересечения, потом меряется время.
+Та же проверка (и граничные случаи) — в тестах: python -m pytest tests/test_slots.py
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from app.core.slots import (
+    WORK_START_HOUR,
+    WORK_END_HOUR,
+    appointment_intervals,
+    free_slots,
+    has_overlap,
+    merge_intervals,
+    work_window,
+)
+
+DURATIONS = [15, 20, 30, 45, 60, 90]
+
+
+def naive_slots(appointments, check_date: date, duration: timedelta) -> list[str]:
+    """Старый алгоритм из get_available_slots (слоты × записи)."""
+    available_slots = []
+    current_slot = datetime.combine(check_date, datetime.min.time()).replace(hour=WORK_START_HOUR)
+    work_end = current_slot.replace(hour=WORK_END_HOUR)
+
+    while current_slot + duration <= work_end:
+        slot_end = current_slot + duration
+        is_free = True
+        for appt in appointments:
+            appt_end = appt.time_start + timedelta(minutes=appt.service.duration_minutes)
+            if current_slot < appt_end and slot_end > appt.time_start:
+                is_free = False
+                break
+        if is_free:
+            available_slots.append(current_slot.strftime("%H:%M"))
+        current_slot += timedelta(minutes=30)
+    return available_slots
+
+
+def naive_overlap(appointments, start: datetime, end: datetime) -> bool:
+    """Старая проверка накладок из create_appointment."""
+    for existing in appointments:
+        existing_end = existing.time_start + timedelta(minutes=existing.service.duration_minutes)
+        if start < existing_end and end > existing.time_start:
+            return True
+    return False
+
+
+def engine_slots(appointments, check_date: date, duration: timedelta) -> list[str]:
+    busy = merge_intervals(appointment_intervals(appointments))
+    return [slot.strftime("%H:%M") for slot in free_slots(busy, work_window(check_date), duration)]
+
+
+def random_day(rng: random.Random, check_date: date, count: int) -> list:
+    """Случайные (в том числе пересекающиеся и выходящие за рабочее время) записи на день."""
+    day_start = datetime.combine(check_date, datetime.min.time())
+    appointments = []
+    for _ in range(count):
+        time_start = day_start + timedelta(
+            minutes=rng.randrange(8 * 60, 21 * 60), seconds=rng.choice([0, 0, 0, 30])
+        )
+        duration_minutes = rng.choice(DURATIONS)
+        appointments.append(SimpleNamespace(
+            time_start=time_start,
+            time_end=time_start + timedelta(minutes=duration_minutes),
+            service=SimpleNamespace(duration_minutes=duration_minutes),
+        ))
+    return appointments
+
+
+def check_equivalence(rng: random.Random, days: int, per_day: int) -> None:
+    check_date = date(2025, 1, 1)
+    for i in range(days):
+        appointments = random_day(rng, check_date, rng.randrange(0, per_day + 1))
+        duration = timedelta(minutes=rng.choice(DURATIONS))
+        expected = naive_slots(appointments, check_date, duration)
+        actual = engine_slots(appointments, check_date, duration)
+        if expected != actual:
+            raise SystemExit(f"День {i}: слоты расходятся\n  naive : {expected}\n  engine: {actual}")
+
+        busy = merge_intervals(appointment_intervals(appointments))
+        for _ in range(20):
+            start = datetime.combine(check_date, datetime.min.time()) + timedelta(
+                minutes=rng.randrange(9 * 60, 21 * 60)
+            )
+            end = start + duration
+            if naive_overlap(appointments, start, end) != has_overlap(busy, start, end):
+                raise SystemExit(f"День {i}: проверка пересечения расходится для {start}")
+
+
+def bench(fn, days_data, duration: timedelta) -> float:
+    t0 = time.perf_counter()
+    for check_date, appointments in days_data:
+        fn(appointments, check_date, duration)
+    return time.perf_counter() - t0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=2000)
+    parser.add_argument("--appointments", type=int, default=40, help="записей на день")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    check_equivalence(rng, args.days, args.appointments)
+    print(f"OK: {args.days} дней, результаты совпадают")
+
+    check_date = date(2025, 1, 1)
+    days_data = [(check_date, random_day(rng, check_date, args.appointments)) for _ in range(args.days)]
+    duration = timedelta(minutes=30)
+    naive = bench(naive_slots, days_data, duration)
+    engine = bench(engine_slots, days_data, duration)
+    print(f"naive : {naive * 1e6 / args.days:8.1f} мкс/день")
+    print(f"engine: {engine * 1e6 / args.days:8.1f} мкс/день  (x{naive / engine:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Время старта воркера и задержка первых запросов после него — с прогревом и без.
+
+Запуск из корня проекта (база засеяна benchmarks.seed, свой сервер не нужен —
+скрипт сам поднимает uvicorn на --port):
+    python -m benchmarks.bench_startup --port 8765 --runs 3
+
+Для каждого режима (STARTUP_WARMUP=false/true) скрипт --runs раз запускает uvicorn,
+ждёт первого ответа и меряет первые запросы к /services/, /appointments/slots/ и /auth/token,
+а затем те же запросы «на горячую». Разница первых и горячих — то, что платят клиенты
+сразу после rolling restart.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+import httpx
+
+REQUESTS = ["services", "slots", "login"]
+
+
+async def first_requests(client: httpx.AsyncClient, args) -> dict[str, float]:
+    """Все три запроса одновременно, как пришли бы от разных клиентов сразу после старта."""
+    day = (date.today() + timedelta(days=1)).isoformat()
+
+    async def timed(name: str, request) -> tuple[str, float]:
+        t0 = time.perf_counter()
+        response = await request
+        response.raise_for_status()
+        return name, (time.perf_counter() - t0) * 1000
+
+    results = await asyncio.gather(
+        timed("services", client.get("/services/")),
+        timed("slots", client.get("/appointments/slots/", params={"service_id": 1, "check_date": day})),
+        timed("login", client.post("/auth/token", data={"username": args.email, "password": args.password})),
+    )
+    return dict(results)
+
+
+async def measure(args, warmup: bool) -> dict[str, float]:
+    env = {**os.environ, "STARTUP_WARMUP": str(warmup).lower()}
+    t0 = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30) as client:
+            while True:
+                try:
+                    # "/" не ходит в базу: это момент, когда воркер начал принимать запросы
+                    await client.get("/")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.02)
+            result = {"ready": (time.perf_counter() - t0) * 1000}
+            first = await first_requests(client, args)
+            hot = await first_requests(client, args)
+            for name in REQUESTS:
+                result[f"{name} first"] = first[name]
+                result[f"{name} hot"] = hot[name]
+            return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--email", default="user0@bench.local")
+    parser.add_argument("--password", default="bench-password")
+    args = parser.parse_args()
+
+    for warmup in (False, True):
+        runs = [asyncio.run(measure(args, warmup)) for _ in range(args.runs)]
+        print(f"STARTUP_WARMUP={str(warmup).lower()} (median of {args.runs}, ms)")
+        for key in runs[0]:
+            print(f"  {key:<16} {statistics.median(run[key] for run in runs):8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Асинхронный HTTP-драйвер нагрузки, который проигрывает сценарии из JSONL.
+
+Запуск из корня проекта (сервер запущен, данные залиты benchmarks.seed):
+    python -m benchmarks.load benchmarks/scenarios/mixed.jsonl \\
+        --url http://localhost:8000 --concurrency 50 --duration 30 \\
+        --start 2031-01-01 --days 30 --json after.json
+
+Каждая строка сценария — один тип запроса:
+    {"name": "slots", "method": "GET", "path": "/appointments/slots/",
+     "params": {"service_id": "{service_id}", "check_date": "{date}"},
+     "auth": null, "weight": 10, "expect": [200]}
+
+  * weight — относительная частота (по умолчанию 1);
+  * auth — null, "client" или "admin" (токены берутся заранее через /auth/token);
+  * expect — коды ответа, которые не считаются ошибкой (по умолчанию [200]);
+  * в строках params/json/data подставляются {service_id}, {date}, {datetime}, {user_email},
+    {password} — случайные значения из засеянного горизонта.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+
+import httpx
+
+from app.core.slots import SLOT_STEP, WORK_END_HOUR, WORK_START_HOUR
+from benchmarks.report import Recorder, print_summary
+
+
+def load_scenario(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+class Placeholders:
+    """Случайные значения для подстановки в запросы сценария."""
+
+    def __init__(self, rng: random.Random, service_ids: list[int], start: date, days: int, users: int, password: str):
+        self.rng = rng
+        self.service_ids = service_ids
+        self.start = start
+        self.days = days
+        self.users = users
+        self.password = password
+
+    def values(self) -> dict[str, str]:
+        day = self.start + timedelta(days=self.rng.randrange(self.days))
+        slots_per_day = (WORK_END_HOUR - WORK_START_HOUR) * 60 // int(SLOT_STEP.total_seconds() // 60)
+        slot = datetime.combine(day, datetime.min.time()).replace(hour=WORK_START_HOUR) + SLOT_STEP * self.rng.randrange(slots_per_day)
+        return {
+            "service_id": str(self.rng.choice(self.service_ids)),
+            "date": day.isoformat(),
+            "datetime": slot.isoformat(),
+            "user_email": f"user{self.rng.randrange(max(self.users, 1))}@bench.local",
+            "password": self.password,
+        }
+
+    def fill(self, value, values: dict[str, str]):
+        if isinstance(value, str):
+            filled = value.format(**values)
+            # Целиком подставленные числа отправляем числами (service_id в JSON)
+            return int(filled) if filled.isdigit() and value != filled else filled
+        if isinstance(value, dict):
+            return {k: self.fill(v, values) for k, v in value.items()}
+        if isinstance(value, list):
+            return [self.fill(v, values) for v in value]
+        return value
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> dict[str, str]:
+    response = await client.post("/auth/token", data={"username": email, "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def worker(client, scenario, weights, placeholders, tokens, recorder, deadline) -> None:
+    rng = placeholders.rng
+    while time.perf_counter() < deadline:
+        step = rng.choices(scenario, weights=weights)[0]
+        values = placeholders.values()
+        headers = tokens.get(step.get("auth"), {})
+        t0 = time.perf_counter()
+        try:
+            response = await client.request(
+                step.get("method", "GET"),
+                step["path"],
+                params=placeholders.fill(step.get("params"), values),
+                json=placeholders.fill(step.get("json"), values),
+                data=placeholders.fill(step.get("data"), values),
+                headers=headers,
+            )
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        latency_ms = (time.perf_counter() - t0) * 1000
+        recorder.add(step["name"], latency_ms, status, status in step.get("expect", [200]))
+
+
+async def run(args) -> dict:
+    scenario = load_scenario(args.scenario)
+    weights = [step.get("weight", 1) for step in scenario]
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        response = await client.get("/services/", params={"limit": 1000})
+        response.raise_for_status()
+        service_ids = [service["id"] for service in response.json()]
+        if not service_ids:
+            raise SystemExit("Нет услуг: сначала запустите python -m benchmarks.seed")
+
+        tokens = {
+            "client": await login(client, "user0@bench.local", args.password),
+            "admin": await login(client, "admin@bench.local", args.password),
+        }
+        placeholders = Placeholders(
+            random.Random(args.seed), service_ids, args.start or date.today(), args.days, args.users, args.password
+        )
+
+        recorder = Recorder()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            worker(client, scenario, weights, placeholders, tokens, recorder, deadline)
+            for _ in range(args.concurrency)
+        ))
+        return recorder.summary(time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenario", help="JSONL-файл сценария")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="секунд")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="первый засеянный день")
+    parser.add_argument("--days", type=int, default=60, help="горизонт, как у seed")
+    parser.add_argument("--users", type=int, default=1000, help="сколько userN засеяно")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="сохранить отчёт в файл (для benchmarks.report)")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
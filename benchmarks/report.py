@@ -0,0 +1,90 @@
+"""
+Отчёт по результатам нагрузочного прогона: пропускная способность и p50/p95/p99.
+
+Обычно вызывается из benchmarks.load. Отдельно — для сравнения двух сохранённых прогонов:
+    python -m benchmarks.report before.json after.json
+"""
+import argparse
+import json
+from collections import Counter
+
+
+def percentile(values: list[float], p: float) -> float:
+    """Перцентиль по ближайшему рангу (values не обязаны быть отсортированы)."""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, round(p / 100 * (len(values) - 1)))
+    return values[index]
+
+
+class Recorder:
+    """Собирает задержки (мс) и коды ответов по имени запроса."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.statuses: dict[str, Counter] = {}
+        self.unexpected: Counter = Counter()
+
+    def add(self, name: str, latency_ms: float, status: int, expected: bool = True) -> None:
+        self.latencies.setdefault(name, []).append(latency_ms)
+        self.statuses.setdefault(name, Counter())[status] += 1
+        if not expected:
+            self.unexpected[name] += 1
+
+    def summary(self, duration_s: float) -> dict:
+        rows = {}
+        for name, values in sorted(self.latencies.items()):
+            rows[name] = {
+                "count": len(values),
+                "rps": round(len(values) / duration_s, 1),
+                "p50": round(percentile(values, 50), 2),
+                "p95": round(percentile(values, 95), 2),
+                "p99": round(percentile(values, 99), 2),
+                "max": round(max(values), 2),
+                "unexpected": self.unexpected[name],
+                "statuses": {str(k): v for k, v in sorted(self.statuses[name].items())},
+            }
+        total = sum(row["count"] for row in rows.values())
+        return {"duration_s": round(duration_s, 2), "total": total, "rps": round(total / duration_s, 1), "requests": rows}
+
+
+def print_summary(summary: dict) -> None:
+    print(f"{'request':<24} {'count':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'bad':>5}  statuses")
+    for name, row in summary["requests"].items():
+        print(
+            f"{name:<24} {row['count']:>7} {row['rps']:>8} {row['p50']:>8} {row['p95']:>8} "
+            f"{row['p99']:>8} {row['max']:>8} {row['unexpected']:>5}  {row['statuses']}"
+        )
+    print(f"total: {summary['total']} requests in {summary['duration_s']} s, {summary['rps']} req/s")
+
+
+def print_comparison(before: dict, after: dict) -> None:
+    """Изменение p50/p99 и rps по каждому запросу: положительный % — стало медленнее."""
+    print(f"{'request':<24} {'p50 ms':>17} {'p99 ms':>17} {'rps':>15}")
+    for name, new in after["requests"].items():
+        old = before["requests"].get(name)
+        if old is None:
+            continue
+
+        def delta(key: str) -> str:
+            change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            return f"{new[key]:>8} ({change:+.0f}%)"
+
+        print(f"{name:<24} {delta('p50'):>17} {delta('p99'):>17} {delta('rps'):>15}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+    print_comparison(before, after)
+
+
+if __name__ == "__main__":
+    main()
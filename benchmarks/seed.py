@@ -0,0 +1,155 @@
+"""
+Генератор синтетических данных для нагрузочных тестов.
+
+Запуск из корня проекта (база из DATABASE_URL, миграции уже применены):
+    python -m benchmarks.seed --users 1000 --masters 4 --services 12 --per-day 12 --days 60 --truncate
+
+Создаёт:
+  * admin@bench.local, master0..masterM@bench.local и user0..userN@bench.local с паролем --password;
+  * --services услуг с разной длительностью;
+  * по --per-day записей на каждый день горизонта у каждого мастера (без накладок, в рабочие часы),
+    начиная с --start (по умолчанию сегодня). С --masters 0 — одно кресло без мастера.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, text
+
+from app.core.security import get_password_hash
+from app.core.slots import SLOT_STEP, WORK_END_HOUR, WORK_START_HOUR
+from app.db.daily_stats import rebuild as rebuild_daily_stats
+from app.db.session import AsyncSessionLocal, engine
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.models.user import User
+
+DURATIONS = [15, 30, 30, 45, 60, 90]
+BATCH_SIZE = 5000
+
+
+def day_plan(rng: random.Random, day: date, services: list[tuple[int, int]], count: int) -> list[tuple]:
+    """
+    count записей на день без пересечений (сколько влезет в рабочие часы):
+    выбираем услуги, а оставшееся свободное время случайно раскидываем паузами по сетке слотов.
+    """
+    work_start = datetime.combine(day, datetime.min.time()).replace(hour=WORK_START_HOUR)
+    total_slots = (WORK_END_HOUR - WORK_START_HOUR) * 60 // int(SLOT_STEP.total_seconds() // 60)
+
+    chosen = [rng.choice(services) for _ in range(count)]
+    sizes = [-(-timedelta(minutes=duration) // SLOT_STEP) for _, duration in chosen]
+    while sum(sizes) > total_slots:
+        chosen.pop()
+        sizes.pop()
+
+    # Паузы перед каждой записью: случайное разбиение свободных слотов
+    free = total_slots - sum(sizes)
+    cuts = sorted(rng.randint(0, free) for _ in chosen)
+    gaps = [b - a for a, b in zip([0] + cuts, cuts)]
+
+    plan = []
+    slot = 0
+    for (service_id, duration), size, gap in zip(chosen, sizes, gaps):
+        slot += gap
+        time_start = work_start + slot * SLOT_STEP
+        plan.append((service_id, time_start, time_start + timedelta(minutes=duration)))
+        slot += size
+    return plan
+
+
+async def seed(args) -> None:
+    rng = random.Random(args.seed)
+    t0 = time.perf_counter()
+
+    async with AsyncSessionLocal() as db:
+        if args.truncate:
+            await db.execute(text("TRUNCATE appointments, services, users RESTART IDENTITY CASCADE"))
+
+        hashed = get_password_hash(args.password)  # Один хеш на всех: bcrypt слишком медленный
+        users = [{
+            "email": "admin@bench.local", "hashed_password": hashed,
+            "full_name": "Bench Admin", "phone": None, "role": "admin", "is_active": True,
+        }]
+        users += [
+            {
+                "email": f"user{i}@bench.local", "hashed_password": hashed,
+                "full_name": f"User {i}", "phone": f"+48{500000000 + i}",
+                "role": "client", "is_active": True,
+            }
+            for i in range(args.users)
+        ]
+        users += [
+            {
+                "email": f"master{i}@bench.local", "hashed_password": hashed,
+                "full_name": f"Master {i}", "phone": None, "role": "master", "is_active": True,
+            }
+            for i in range(args.masters)
+        ]
+        user_ids = list((await db.execute(insert(User).returning(User.id), users)).scalars())
+        client_ids = user_ids[1:args.users + 1]
+        master_ids = user_ids[args.users + 1:] or [None]
+
+        services = [
+            {
+                "name": f"Usługa {i}", "price": rng.randrange(30, 300, 10),
+                "duration_minutes": rng.choice(DURATIONS), "description": None,
+            }
+            for i in range(args.services)
+        ]
+        result = await db.execute(
+            insert(Service).returning(Service.id, Service.duration_minutes, Service.price), services
+        )
+        rows = result.all()
+        service_rows = [(service_id, duration) for service_id, duration, _ in rows]
+        prices = {service_id: price for service_id, _, price in rows}
+
+        start = args.start or date.today()
+        batch, total = [], 0
+        for offset in range(args.days):
+            day = start + timedelta(days=offset)
+            for master_id in master_ids:
+                for service_id, time_start, time_end in day_plan(rng, day, service_rows, args.per_day):
+                    batch.append({
+                        "client_id": rng.choice(client_ids), "service_id": service_id, "master_id": master_id,
+                        "time_start": time_start, "time_end": time_end, "status": "confirmed",
+                        "price": prices[service_id],
+                    })
+            if len(batch) >= BATCH_SIZE:
+                await db.execute(insert(Appointment), batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            await db.execute(insert(Appointment), batch)
+            total += len(batch)
+
+        await db.commit()
+
+    # Сводку для аналитики — одним пересчётом, а не по записи
+    await rebuild_daily_stats()
+
+    await engine.dispose()
+    print(
+        f"users={len(users)} masters={args.masters} services={len(service_rows)} appointments={total} "
+        f"days={args.days} from={start} in {time.perf_counter() - t0:.1f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--masters", type=int, default=4, help="мастеров (0 — одно кресло без мастера)")
+    parser.add_argument("--services", type=int, default=12)
+    parser.add_argument("--per-day", type=int, default=12, help="записей на день у каждого мастера")
+    parser.add_argument("--days", type=int, default=60, help="горизонт в днях")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="первый день (YYYY-MM-DD)")
+    parser.add_argument("--password", default="bench-password")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--truncate", action="store_true", help="очистить таблицы перед заливкой")
+    args = parser.parse_args()
+    asyncio.run(seed(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Движок слотов (app/core/slots.py) против старого вложенного цикла (benchmarks.bench_slots)."""
+import random
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.slots import (
+    appointment_intervals,
+    chair_busy,
+    free_slots_any,
+    group_by_master,
+    has_overlap,
+    merge_intervals,
+    work_window,
+)
+from benchmarks.bench_slots import DURATIONS, engine_slots, naive_overlap, naive_slots, random_day
+
+DAY = date(2025, 1, 1)
+
+
+def at(hour: int, minute: int = 0) -> datetime:
+    return datetime.combine(DAY, datetime.min.time()).replace(hour=hour, minute=minute)
+
+
+def appointment(start: datetime, minutes: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        time_start=start,
+        time_end=start + timedelta(minutes=minutes),
+        service=SimpleNamespace(duration_minutes=minutes),
+    )
+
+
+def assert_same(appointments: list, duration: timedelta) -> list[str]:
+    expected = naive_slots(appointments, DAY, duration)
+    assert engine_slots(appointments, DAY, duration) == expected
+    return expected
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_days_match_naive(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        appointments = random_day(rng, DAY, rng.randrange(0, 41))
+        duration = timedelta(minutes=rng.choice(DURATIONS))
+        assert_same(appointments, duration)
+
+        busy = merge_intervals(appointment_intervals(appointments))
+        for _ in range(20):
+            start = at(9) + timedelta(minutes=rng.randrange(12 * 60))
+            end = start + duration
+            assert has_overlap(busy, start, end) == naive_overlap(appointments, start, end)
+
+
+@pytest.mark.parametrize("minutes", DURATIONS)
+def test_empty_day(minutes):
+    slots = assert_same([], timedelta(minutes=minutes))
+    assert slots[0] == "10:00"
+    assert len(slots) == (10 * 60 - minutes) // 30 + 1
+
+
+def test_back_to_back_bookings():
+    appointments = [appointment(at(10), 30), appointment(at(10, 30), 30), appointment(at(11), 45)]
+    slots = assert_same(appointments, timedelta(minutes=30))
+    assert slots[0] == "12:00"
+    # Стык — не пересечение: слот, который кончается ровно в начале записи, свободен
+    busy = merge_intervals(appointment_intervals(appointments))
+    assert not has_overlap(busy, at(9, 30), at(10))
+    assert not has_overlap(busy, at(11, 45), at(12, 15))
+    assert has_overlap(busy, at(11, 30), at(12))
+
+
+def test_bookings_crossing_work_window():
+    appointments = [appointment(at(9), 105), appointment(at(19, 30), 90)]
+    slots = assert_same(appointments, timedelta(minutes=30))
+    assert slots[0] == "11:00"
+    assert slots[-1] == "19:00"
+
+
+def test_service_longer_than_any_gap():
+    appointments = [appointment(at(12), 30), appointment(at(15), 30), appointment(at(18), 30)]
+    assert assert_same(appointments, timedelta(minutes=180)) == []
+
+
+def test_unaligned_booking_end():
+    # Запись кончается не на сетке: ближайший слот — следующий шаг сетки
+    appointments = [appointment(at(10, 5), 40)]
+    slots = assert_same(appointments, timedelta(minutes=30))
+    assert slots[0] == "11:00"
+
+
+def booking(master_id: int | None, start: datetime, minutes: int) -> SimpleNamespace:
+    return SimpleNamespace(master_id=master_id, time_start=start, time_end=start + timedelta(minutes=minutes))
+
+
+def naive_slots_any(bookings: list, chairs: list, duration: timedelta) -> list[datetime]:
+    """
+    Перебор как в ограничении ex_<партиция>_no_overlap: две записи конфликтуют, если у них один мастер,
+    либо у одной из них мастер не указан. chair = None — одно кресло на всех.
+    """
+    slots = []
+    slot, work_end = work_window(DAY)
+    while slot + duration <= work_end:
+        slot_end = slot + duration
+        for chair in chairs:
+            if not any(
+                chair is None or b.master_id is None or b.master_id == chair
+                for b in bookings
+                if slot < b.time_end and slot_end > b.time_start
+            ):
+                slots.append(slot)
+                break
+        slot += timedelta(minutes=30)
+    return slots
+
+
+def assert_same_any(bookings: list, chairs: list, duration: timedelta) -> list[datetime]:
+    expected = naive_slots_any(bookings, chairs, duration)
+    busy_by_master = group_by_master((b.master_id, b.time_start, b.time_end) for b in bookings)
+    assert free_slots_any(busy_by_master, chairs, work_window(DAY), duration) == expected
+    return expected
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_random_masters_match_naive(seed):
+    rng = random.Random(seed)
+    for _ in range(20):
+        bookings = [
+            booking(
+                rng.choice([None, 1, 2, 3, 3]),
+                at(9) + timedelta(minutes=15 * rng.randrange(48)),
+                rng.choice(DURATIONS),
+            )
+            for _ in range(rng.randrange(0, 16))
+        ]
+        chairs = rng.choice([[None], [1], [1, 2], [1, 2, 3]])
+        assert_same_any(bookings, chairs, timedelta(minutes=rng.choice(DURATIONS)))
+
+
+def test_booking_without_master_blocks_every_chair():
+    bookings = [booking(None, at(10), 60)]
+    busy_by_master = group_by_master((b.master_id, b.time_start, b.time_end) for b in bookings)
+    assert chair_busy(busy_by_master, 1) == [(at(10), at(11))]
+    assert chair_busy(busy_by_master, 2) == [(at(10), at(11))]
+    slots = assert_same_any(bookings, [1, 2], timedelta(minutes=30))
+    assert slots[0] == at(11)
+
+
+def test_disjoint_masters_cover_each_other():
+    # Мастер 1 занят утром, мастер 2 — после обеда: вместе свободен весь день
+    bookings = [booking(1, at(10), 240), booking(2, at(14), 360)]
+    busy_by_master = group_by_master((b.master_id, b.time_start, b.time_end) for b in bookings)
+    assert chair_busy(busy_by_master, 1) == [(at(10), at(14))]
+    assert chair_busy(busy_by_master, 2) == [(at(14), at(20))]
+    slots = assert_same_any(bookings, [1, 2], timedelta(minutes=30))
+    assert slots[0] == at(10) and slots[-1] == at(19, 30)
+    assert len(slots) == 20
+    # Поодиночке у каждого мастера — только своя половина дня
+    assert assert_same_any(bookings, [1], timedelta(minutes=30))[0] == at(14)
+    assert assert_same_any(bookings, [2], timedelta(minutes=30))[-1] == at(13, 30)
+
+
+def test_single_chair_counts_every_booking():
+    bookings = [booking(1, at(10), 240), booking(2, at(14), 300), booking(None, at(19), 60)]
+    busy_by_master = group_by_master((b.master_id, b.time_start, b.time_end) for b in bookings)
+    assert sorted(chair_busy(busy_by_master, None)) == [(at(10), at(14)), (at(14), at(19)), (at(19), at(20))]
+    assert assert_same_any(bookings, [None], timedelta(minutes=30)) == []